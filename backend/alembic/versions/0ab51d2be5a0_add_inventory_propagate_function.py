@@ -0,0 +1,108 @@
+"""add inventory_propagate function
+
+Revision ID: 0ab51d2be5a0
+Revises: fe6d2d16f136
+Create Date: 2026-10-17 14:10:02.118233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0ab51d2be5a0"
+down_revision: Union[str, Sequence[str], None] = "fe6d2d16f136"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Mirrors services/inventory.py::_fifo_step (3-day shelf life, FIFO sell
+# order age-2 -> age-1 -> today). Missing calendar days are rolled silently
+# with db = pg = 0 and never persisted.
+PROPAGATE_FN = """
+CREATE OR REPLACE FUNCTION inventory_propagate(
+    p_store_id uuid,
+    p_item_ids uuid[],
+    p_b0 integer[],
+    p_b1 integer[],
+    p_start date
+) RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+    i integer;
+    r record;
+    cur date;
+    b0 integer;
+    b1 integer;
+    p integer;
+    use2 integer;
+    use1 integer;
+    r0 integer;
+    r1 integer;
+    w integer;
+    n_changed integer := 0;
+BEGIN
+    FOR i IN 1 .. coalesce(array_length(p_item_ids, 1), 0) LOOP
+        b0 := p_b0[i];
+        b1 := p_b1[i];
+        cur := p_start;
+
+        FOR r IN
+            SELECT id, date, db, pg, waste, rem, b0_end, b1_end
+            FROM inventories
+            WHERE store_id = p_store_id
+              AND item_id = p_item_ids[i]
+              AND date >= p_start
+            ORDER BY date
+            FOR UPDATE
+        LOOP
+            -- silent gap days: age-2 expires, age-1 -> age-2, nothing new
+            WHILE cur < r.date LOOP
+                b1 := b0;
+                b0 := 0;
+                cur := cur + 1;
+            END LOOP;
+
+            use2 := least(r.pg, b1);
+            p := r.pg - use2;
+            use1 := least(p, b0);
+            r1 := b0 - use1;
+            p := p - use1;
+            r0 := r.db - least(p, r.db);
+            w := b1 - use2;
+
+            IF (w, r1 + r0, r0, r1)
+                IS DISTINCT FROM (r.waste, r.rem, r.b0_end, r.b1_end) THEN
+                UPDATE inventories
+                SET waste = w,
+                    rem = r1 + r0,
+                    b0_end = r0,
+                    b1_end = r1,
+                    updated_at = now()
+                WHERE id = r.id;
+                n_changed := n_changed + 1;
+            END IF;
+
+            b0 := r0;
+            b1 := r1;
+            cur := r.date + 1;
+        END LOOP;
+    END LOOP;
+
+    RETURN n_changed;
+END;
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(PROPAGATE_FN)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "DROP FUNCTION IF EXISTS "
+        "inventory_propagate(uuid, uuid[], integer[], integer[], date)"
+    )
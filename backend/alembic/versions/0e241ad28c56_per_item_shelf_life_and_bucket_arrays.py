@@ -0,0 +1,187 @@
+"""per-item shelf life and bucket arrays
+
+Revision ID: 0e241ad28c56
+Revises: dd600e1cb41e
+Create Date: 2026-10-17 16:47:05.392118
+
+"""
+import importlib.util
+from pathlib import Path
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0e241ad28c56"
+down_revision: Union[str, Sequence[str], None] = "dd600e1cb41e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PREVIOUS_SIGNATURE = (
+    "inventory_propagate(uuid, uuid[], integer[], integer[], date, boolean)"
+)
+CURRENT_SIGNATURE = "inventory_propagate(uuid, uuid[], integer[], date, boolean)"
+
+# Mirrors services/inventory.py::_fifo_step for any items.shelf_life_days.
+# p_seeds is a rectangular (items x width) array of carried buckets,
+# zero-padded; each item only reads its first shelf_life_days - 1 slots.
+# Returns the date of every row it rewrote.
+PROPAGATE_FN = """
+CREATE OR REPLACE FUNCTION inventory_propagate(
+    p_store_id uuid,
+    p_item_ids uuid[],
+    p_seeds integer[],
+    p_start date,
+    p_converge boolean DEFAULT true
+) RETURNS SETOF date
+LANGUAGE plpgsql AS $$
+DECLARE
+    i integer;
+    j integer;
+    k integer;
+    n integer;
+    g integer;
+    p integer;
+    take integer;
+    total integer;
+    r record;
+    cur date;
+    s integer[];
+    stock integer[];
+    stored integer[];
+BEGIN
+    FOR i IN 1 .. coalesce(array_length(p_item_ids, 1), 0) LOOP
+        SELECT coalesce(shelf_life_days, 3) - 1 INTO n
+        FROM items WHERE id = p_item_ids[i];
+        n := coalesce(n, 2);
+
+        s := array_fill(0, ARRAY[n]);
+        FOR k IN 1 .. n LOOP
+            s[k] := coalesce(p_seeds[i][k], 0);
+        END LOOP;
+        cur := p_start;
+
+        FOR r IN
+            SELECT id, date, db, pg, waste, rem, buckets
+            FROM inventories
+            WHERE store_id = p_store_id
+              AND item_id = p_item_ids[i]
+              AND date >= p_start
+            ORDER BY date
+            FOR UPDATE
+        LOOP
+            -- silent gap days: everything ages by g, past-life stock is gone
+            g := r.date - cur;
+            IF g > 0 THEN
+                FOR k IN REVERSE n .. 1 LOOP
+                    s[k] := CASE WHEN k - g >= 1 THEN s[k - g] ELSE 0 END;
+                END LOOP;
+            END IF;
+
+            -- stock[j] is aged j - 1 days; sell oldest first
+            stock := ARRAY[r.db] || s;
+            p := r.pg;
+            FOR j IN REVERSE n + 1 .. 1 LOOP
+                take := least(p, stock[j]);
+                stock[j] := stock[j] - take;
+                p := p - take;
+            END LOOP;
+
+            s := array_fill(0, ARRAY[n]);
+            total := 0;
+            FOR k IN 1 .. n LOOP
+                s[k] := stock[k];
+                total := total + stock[k];
+            END LOOP;
+
+            IF (stock[n + 1], total, s)
+                IS DISTINCT FROM (r.waste, r.rem, r.buckets) THEN
+                UPDATE inventories
+                SET waste = stock[n + 1],
+                    rem = total,
+                    buckets = s,
+                    updated_at = now()
+                WHERE id = r.id;
+                RETURN NEXT r.date;
+            END IF;
+
+            stored := array_fill(0, ARRAY[n]);
+            FOR k IN 1 .. n LOOP
+                stored[k] := coalesce(r.buckets[k], 0);
+            END LOOP;
+            EXIT WHEN p_converge AND s = stored;
+
+            cur := r.date + 1;
+        END LOOP;
+    END LOOP;
+
+    RETURN;
+END;
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "items",
+        sa.Column(
+            "shelf_life_days",
+            sa.Integer(),
+            server_default=sa.text("3"),
+            nullable=False,
+        ),
+    )
+    op.create_check_constraint("chk_shelf_life_pos", "items", "shelf_life_days >= 1")
+
+    op.add_column(
+        "inventories",
+        sa.Column(
+            "buckets",
+            postgresql.ARRAY(sa.Integer()),
+            server_default=sa.text("'{}'"),
+            nullable=False,
+        ),
+    )
+    op.execute("UPDATE inventories SET buckets = ARRAY[b0_end, b1_end]")
+    op.create_check_constraint(
+        "chk_buckets_nonneg", "inventories", "0 <= ALL(buckets)"
+    )
+
+    op.execute(f"DROP FUNCTION IF EXISTS {PREVIOUS_SIGNATURE}")
+    op.execute(PROPAGATE_FN)
+
+    op.drop_column("inventories", "b1_end")
+    op.drop_column("inventories", "b0_end")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column(
+        "inventories",
+        sa.Column("b0_end", sa.Integer(), server_default=sa.text("0"), nullable=False),
+    )
+    op.add_column(
+        "inventories",
+        sa.Column("b1_end", sa.Integer(), server_default=sa.text("0"), nullable=False),
+    )
+    op.execute(
+        "UPDATE inventories "
+        "SET b0_end = coalesce(buckets[1], 0), b1_end = coalesce(buckets[2], 0)"
+    )
+
+    op.execute(f"DROP FUNCTION IF EXISTS {CURRENT_SIGNATURE}")
+    path = Path(__file__).with_name("dd600e1cb41e_add_inventory_daily_rollups.py")
+    spec = importlib.util.spec_from_file_location("previous_revision", path)
+    previous = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(previous)
+    op.execute(previous.PROPAGATE_FN)
+
+    op.drop_constraint("chk_buckets_nonneg", "inventories", type_="check")
+    op.drop_column("inventories", "buckets")
+    op.drop_constraint("chk_shelf_life_pos", "items", type_="check")
+    op.drop_column("items", "shelf_life_days")
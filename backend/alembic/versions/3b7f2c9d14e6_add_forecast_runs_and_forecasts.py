@@ -0,0 +1,68 @@
+"""add forecast_runs and forecasts
+
+Revision ID: 3b7f2c9d14e6
+Revises: fba86029a07e
+Create Date: 2026-10-17 18:42:37.518204
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3b7f2c9d14e6"
+down_revision: Union[str, Sequence[str], None] = "fba86029a07e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "forecast_runs",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("engine", sa.String(length=32), nullable=False),
+        sa.Column("horizon", sa.Integer(), nullable=False),
+        sa.Column("history_start", sa.Date(), nullable=False),
+        sa.Column("history_end", sa.Date(), nullable=False),
+        sa.Column(
+            "series_count", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_forecast_runs_created_at", "forecast_runs", ["created_at"], unique=False
+    )
+    op.create_table(
+        "forecasts",
+        sa.Column("run_id", sa.UUID(), nullable=False),
+        sa.Column("store_name", sa.String(length=120), nullable=False),
+        sa.Column("item_name", sa.String(length=120), nullable=False),
+        sa.Column("ds", sa.Date(), nullable=False),
+        sa.Column("yhat", sa.Float(), nullable=False),
+        sa.Column("yhat_lower", sa.Float(), nullable=False),
+        sa.Column("yhat_upper", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["run_id"], ["forecast_runs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("run_id", "store_name", "item_name", "ds"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("forecasts")
+    op.drop_index("ix_forecast_runs_created_at", table_name="forecast_runs")
+    op.drop_table("forecast_runs")
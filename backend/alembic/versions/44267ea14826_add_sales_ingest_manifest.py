@@ -0,0 +1,54 @@
+"""sales ingest manifest tables
+
+Revision ID: 44267ea14826
+Revises: 3b7f2c9d14e6
+Create Date: 2026-10-17 21:05:48.310927
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "44267ea14826"
+down_revision: Union[str, Sequence[str], None] = "3b7f2c9d14e6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ingest.ensure_manifest used to create these on demand, so adopt them
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sales_manifest_files (
+            source text PRIMARY KEY,
+            content_hash char(64) NOT NULL,
+            row_count bigint NOT NULL,
+            ingested_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sales_manifest_days (
+            source text NOT NULL
+                REFERENCES sales_manifest_files (source) ON DELETE CASCADE,
+            sales_date date NOT NULL,
+            content_hash char(64) NOT NULL,
+            PRIMARY KEY (source, sales_date)
+        )
+        """
+    )
+    # stores a source had rows for on each day; a re-export's changed days
+    # are cleared for exactly these before the new rows are merged
+    op.execute(
+        "ALTER TABLE sales_manifest_days "
+        "ADD COLUMN IF NOT EXISTS store_names text[] NOT NULL DEFAULT '{}'"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("sales_manifest_days")
+    op.drop_table("sales_manifest_files")
@@ -0,0 +1,163 @@
+"""add inventory_daily_rollups; inventory_propagate returns changed dates
+
+Revision ID: dd600e1cb41e
+Revises: dd6affe5629e
+Create Date: 2026-10-17 16:02:19.734510
+
+"""
+import importlib.util
+from pathlib import Path
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "dd600e1cb41e"
+down_revision: Union[str, Sequence[str], None] = "dd6affe5629e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SIGNATURE = "inventory_propagate(uuid, uuid[], integer[], integer[], date, boolean)"
+
+
+# As f83fc1134252, but returns the date of every row it rewrote so callers
+# can refresh the matching rollup cells.
+PROPAGATE_FN = """
+CREATE OR REPLACE FUNCTION inventory_propagate(
+    p_store_id uuid,
+    p_item_ids uuid[],
+    p_b0 integer[],
+    p_b1 integer[],
+    p_start date,
+    p_converge boolean DEFAULT true
+) RETURNS SETOF date
+LANGUAGE plpgsql AS $$
+DECLARE
+    i integer;
+    r record;
+    cur date;
+    b0 integer;
+    b1 integer;
+    p integer;
+    use2 integer;
+    use1 integer;
+    r0 integer;
+    r1 integer;
+    w integer;
+BEGIN
+    FOR i IN 1 .. coalesce(array_length(p_item_ids, 1), 0) LOOP
+        b0 := p_b0[i];
+        b1 := p_b1[i];
+        cur := p_start;
+
+        FOR r IN
+            SELECT id, date, db, pg, waste, rem, b0_end, b1_end
+            FROM inventories
+            WHERE store_id = p_store_id
+              AND item_id = p_item_ids[i]
+              AND date >= p_start
+            ORDER BY date
+            FOR UPDATE
+        LOOP
+            IF r.date - cur = 1 THEN
+                b1 := b0;
+                b0 := 0;
+            ELSIF r.date - cur >= 2 THEN
+                b1 := 0;
+                b0 := 0;
+            END IF;
+
+            use2 := least(r.pg, b1);
+            p := r.pg - use2;
+            use1 := least(p, b0);
+            r1 := b0 - use1;
+            p := p - use1;
+            r0 := r.db - least(p, r.db);
+            w := b1 - use2;
+
+            IF (w, r1 + r0, r0, r1)
+                IS DISTINCT FROM (r.waste, r.rem, r.b0_end, r.b1_end) THEN
+                UPDATE inventories
+                SET waste = w,
+                    rem = r1 + r0,
+                    b0_end = r0,
+                    b1_end = r1,
+                    updated_at = now()
+                WHERE id = r.id;
+                RETURN NEXT r.date;
+            END IF;
+
+            EXIT WHEN p_converge AND r0 = r.b0_end AND r1 = r.b1_end;
+
+            b0 := r0;
+            b1 := r1;
+            cur := r.date + 1;
+        END LOOP;
+    END LOOP;
+
+    RETURN;
+END;
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "inventory_daily_rollups",
+        sa.Column("store_id", sa.UUID(), nullable=False),
+        sa.Column("category", sa.String(length=100), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("db", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("pg", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("waste", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("rem", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column(
+            "waste_value", sa.BigInteger(), server_default=sa.text("0"), nullable=False
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["store_id"], ["stores.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("store_id", "category", "date"),
+    )
+    op.execute(
+        """
+        INSERT INTO inventory_daily_rollups
+            (store_id, category, date, db, pg, waste, rem, waste_value)
+        SELECT i.store_id, it.category, i.date,
+               sum(i.db), sum(i.pg), sum(i.waste), sum(i.rem),
+               sum(i.waste::bigint * it.cost)
+        FROM inventories i
+        JOIN items it ON it.id = i.item_id
+        GROUP BY i.store_id, it.category, i.date
+        """
+    )
+
+    op.execute(f"DROP FUNCTION IF EXISTS {SIGNATURE}")
+    op.execute(PROPAGATE_FN)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(f"DROP FUNCTION IF EXISTS {SIGNATURE}")
+    path = Path(__file__).with_name(
+        "f83fc1134252_inventory_propagate_converge_and_gap_jump.py"
+    )
+    spec = importlib.util.spec_from_file_location("previous_revision", path)
+    previous = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(previous)
+    op.execute(previous.PROPAGATE_FN)
+    op.drop_table("inventory_daily_rollups")
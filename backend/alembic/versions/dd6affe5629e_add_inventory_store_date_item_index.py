@@ -0,0 +1,31 @@
+"""add inventory (store_id, date, item_id) index
+
+Revision ID: dd6affe5629e
+Revises: e9b4901af99e
+Create Date: 2026-10-17 15:38:51.266403
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "dd6affe5629e"
+down_revision: Union[str, Sequence[str], None] = "e9b4901af99e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_inventory_store_date_item",
+        "inventories",
+        ["store_id", "date", "item_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_inventory_store_date_item", table_name="inventories")
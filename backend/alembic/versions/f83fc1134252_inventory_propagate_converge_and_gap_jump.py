@@ -0,0 +1,125 @@
+"""inventory_propagate: stop on convergence, jump gaps in O(1)
+
+Revision ID: f83fc1134252
+Revises: 0ab51d2be5a0
+Create Date: 2026-10-17 14:41:37.502914
+
+"""
+import importlib.util
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f83fc1134252"
+down_revision: Union[str, Sequence[str], None] = "0ab51d2be5a0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Same roll forward as 0ab51d2be5a0, plus:
+# - a gap of one silent day moves age-1 to age-2, two or more empty both
+#   buckets, so long gaps cost nothing;
+# - with p_converge, an item stops at the first row whose recomputed
+#   b0_end/b1_end already match the stored ones.
+PROPAGATE_FN = """
+CREATE OR REPLACE FUNCTION inventory_propagate(
+    p_store_id uuid,
+    p_item_ids uuid[],
+    p_b0 integer[],
+    p_b1 integer[],
+    p_start date,
+    p_converge boolean DEFAULT true
+) RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+    i integer;
+    r record;
+    cur date;
+    b0 integer;
+    b1 integer;
+    p integer;
+    use2 integer;
+    use1 integer;
+    r0 integer;
+    r1 integer;
+    w integer;
+    n_changed integer := 0;
+BEGIN
+    FOR i IN 1 .. coalesce(array_length(p_item_ids, 1), 0) LOOP
+        b0 := p_b0[i];
+        b1 := p_b1[i];
+        cur := p_start;
+
+        FOR r IN
+            SELECT id, date, db, pg, waste, rem, b0_end, b1_end
+            FROM inventories
+            WHERE store_id = p_store_id
+              AND item_id = p_item_ids[i]
+              AND date >= p_start
+            ORDER BY date
+            FOR UPDATE
+        LOOP
+            IF r.date - cur = 1 THEN
+                b1 := b0;
+                b0 := 0;
+            ELSIF r.date - cur >= 2 THEN
+                b1 := 0;
+                b0 := 0;
+            END IF;
+
+            use2 := least(r.pg, b1);
+            p := r.pg - use2;
+            use1 := least(p, b0);
+            r1 := b0 - use1;
+            p := p - use1;
+            r0 := r.db - least(p, r.db);
+            w := b1 - use2;
+
+            IF (w, r1 + r0, r0, r1)
+                IS DISTINCT FROM (r.waste, r.rem, r.b0_end, r.b1_end) THEN
+                UPDATE inventories
+                SET waste = w,
+                    rem = r1 + r0,
+                    b0_end = r0,
+                    b1_end = r1,
+                    updated_at = now()
+                WHERE id = r.id;
+                n_changed := n_changed + 1;
+            END IF;
+
+            EXIT WHEN p_converge AND r0 = r.b0_end AND r1 = r.b1_end;
+
+            b0 := r0;
+            b1 := r1;
+            cur := r.date + 1;
+        END LOOP;
+    END LOOP;
+
+    RETURN n_changed;
+END;
+$$;
+"""
+
+PREVIOUS_SIGNATURE = "inventory_propagate(uuid, uuid[], integer[], integer[], date)"
+CURRENT_SIGNATURE = (
+    "inventory_propagate(uuid, uuid[], integer[], integer[], date, boolean)"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(f"DROP FUNCTION IF EXISTS {PREVIOUS_SIGNATURE}")
+    op.execute(PROPAGATE_FN)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    path = Path(__file__).with_name("0ab51d2be5a0_add_inventory_propagate_function.py")
+    spec = importlib.util.spec_from_file_location("previous_revision", path)
+    previous = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(previous)
+
+    op.execute(f"DROP FUNCTION IF EXISTS {CURRENT_SIGNATURE}")
+    op.execute(previous.PROPAGATE_FN)
@@ -0,0 +1,124 @@
+"""monthly range-partitioned sales table with BRIN and series indexes
+
+Revision ID: fba86029a07e
+Revises: 0e241ad28c56
+Create Date: 2026-10-17 17:20:11.006215
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "fba86029a07e"
+down_revision: Union[str, Sequence[str], None] = "0e241ad28c56"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = """
+    sales_date date NOT NULL,
+    store_name varchar(120) NOT NULL,
+    item_name varchar(120) NOT NULL,
+    sales_qty bigint NOT NULL,
+    sales_amount_inc_vat numeric(14, 2) NOT NULL,
+    vat_amount numeric(14, 2) NOT NULL,
+    net_sales numeric(14, 2) NOT NULL,
+    total_cost numeric(14, 2) NOT NULL,
+    margin numeric(14, 2) NOT NULL,
+    margin_percent numeric(14, 2) NOT NULL
+"""
+
+# Creates one sales_pYYYY_MM partition per month in [p_from, p_to] that does
+# not exist yet. Rows of that month already sitting in sales_default are
+# moved into the new partition before it is attached, so loads never fail
+# for a missing month: they land in the default partition and the ingest
+# calls this afterwards to split them out.
+PARTITION_FN = """
+CREATE OR REPLACE FUNCTION sales_create_partitions(p_from date, p_to date)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+    m date;
+    part text;
+    n_created integer := 0;
+BEGIN
+    IF p_from IS NULL OR p_to IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    m := date_trunc('month', p_from)::date;
+    WHILE m <= p_to LOOP
+        part := format('sales_p%s', to_char(m, 'YYYY_MM'));
+        IF to_regclass(part) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE sales INCLUDING DEFAULTS)', part
+            );
+            EXECUTE format(
+                'WITH moved AS ('
+                '  DELETE FROM sales_default'
+                '  WHERE sales_date >= %L AND sales_date < %L'
+                '  RETURNING *'
+                ') INSERT INTO %I SELECT * FROM moved',
+                m, (m + interval '1 month')::date, part
+            );
+            EXECUTE format(
+                'ALTER TABLE sales ATTACH PARTITION %I '
+                'FOR VALUES FROM (%L) TO (%L)',
+                part, m, (m + interval '1 month')::date
+            );
+            n_created := n_created + 1;
+        END IF;
+        m := (m + interval '1 month')::date;
+    END LOOP;
+
+    RETURN n_created;
+END;
+$$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # xlsxtodb.ensure_table used to create a plain sales table on demand
+    legacy = sa.inspect(op.get_bind()).has_table("sales")
+    if legacy:
+        op.rename_table("sales", "sales_unpartitioned")
+        op.execute("ALTER INDEX IF EXISTS uix_sales RENAME TO uix_sales_unpartitioned")
+
+    op.execute(f"CREATE TABLE sales ({COLUMNS}) PARTITION BY RANGE (sales_date)")
+    op.execute("CREATE TABLE sales_default PARTITION OF sales DEFAULT")
+    op.execute(PARTITION_FN)
+
+    op.execute(
+        "CREATE UNIQUE INDEX uix_sales ON sales (sales_date, store_name, item_name)"
+    )
+    op.execute("CREATE INDEX ix_sales_date_brin ON sales USING brin (sales_date)")
+    op.execute(
+        "CREATE INDEX ix_sales_series ON sales (store_name, item_name, sales_date)"
+    )
+
+    if legacy:
+        op.execute(
+            "SELECT sales_create_partitions(min(sales_date), max(sales_date)) "
+            "FROM sales_unpartitioned"
+        )
+        op.execute(
+            "INSERT INTO sales SELECT * FROM sales_unpartitioned "
+            "ON CONFLICT (sales_date, store_name, item_name) DO NOTHING"
+        )
+        op.drop_table("sales_unpartitioned")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(f"CREATE TABLE sales_unpartitioned ({COLUMNS})")
+    op.execute("INSERT INTO sales_unpartitioned SELECT * FROM sales")
+    op.execute("DROP TABLE sales")  # drops every partition with it
+    op.execute("DROP FUNCTION IF EXISTS sales_create_partitions(date, date)")
+    op.rename_table("sales_unpartitioned", "sales")
+    op.execute(
+        "CREATE UNIQUE INDEX uix_sales ON sales (sales_date, store_name, item_name)"
+    )
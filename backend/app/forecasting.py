@@ -0,0 +1,515 @@
+"""
+Per-series sales forecasts: one Prophet model per (store_name, item_name),
+fitted in a process pool and returned as a single frame.
+
+Fits are cached per series (parameters, forecast, last training date and a
+fingerprint of the training rows): unchanged series are reused as-is,
+series that only gained days since the cached fit are refitted
+warm-started from its parameters, and series whose earlier rows changed
+are refitted from scratch.
+
+``--engine holt-winters`` swaps Prophet for a vectorized weekly
+Holt-Winters baseline (services/forecast.py) that forecasts every series in
+one pass, in well under a second.
+
+Plotting is a separate stage that only needs that frame and the history,
+so it can run later, elsewhere, or not at all.
+
+Usage
+-----
+$ python -m backend.app.forecasting --start 2025-07-01 --end 2025-07-13
+$ python -m backend.app.forecasting --start 2025-01-01 --end 2025-07-13 \\
+      --workers 8 --horizon 14 --out forecasts.parquet --plot-dir ./forecasts
+$ python -m backend.app.forecasting --start 2025-01-01 --end 2025-07-13 \\
+      --engine holt-winters --save          # serve it from GET /forecasts
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.app.services.forecast import holt_winters_auto
+from backend.app.utils.db import get_async_engine
+from backend.app.utils.util import slugify
+
+SERIES_KEY = ["store_name", "item_name"]
+FORECAST_COLUMNS = SERIES_KEY + ["ds", "yhat", "yhat_lower", "yhat_upper"]
+
+SALES_HISTORY = text(
+    """
+    SELECT
+        sales_date,
+        store_name,
+        item_name,
+        sales_qty,
+        net_sales,
+        margin
+    FROM sales
+    WHERE sales_date BETWEEN :start AND :end
+    """
+)
+
+Series = Tuple[Tuple[str, str], pd.DataFrame]
+
+# Where fitted parameters and forecasts are kept between runs, one JSON file
+# per series; see load_cached / store_cached.
+FORECAST_CACHE_DIR = Path(os.getenv("FORECAST_CACHE_DIR", ".forecast_cache"))
+
+logger = logging.getLogger(__name__)
+
+
+async def load_history(engine: AsyncEngine, start: date, end: date) -> pd.DataFrame:
+    """Daily sales between ``start`` and ``end`` as ds / y per series."""
+    async with engine.connect() as conn:
+        df = await conn.run_sync(
+            lambda sync_conn: pd.read_sql(
+                SALES_HISTORY, sync_conn, params={"start": start, "end": end}
+            )
+        )
+    return df.rename(columns={"sales_date": "ds", "sales_qty": "y"}).assign(
+        ds=lambda d: pd.to_datetime(d["ds"])
+    )
+
+
+def _stan_init(m) -> Dict[str, Any]:
+    """Fitted MAP parameters of ``m`` in the shape Prophet.fit(init=...) takes."""
+    return {
+        "k": float(m.params["k"][0][0]),
+        "m": float(m.params["m"][0][0]),
+        "sigma_obs": float(m.params["sigma_obs"][0][0]),
+        "delta": m.params["delta"][0].tolist(),
+        "beta": m.params["beta"][0].tolist(),
+    }
+
+
+def fit_series(
+    series: Series, horizon: int, init: Optional[Dict[str, Any]] = None
+) -> Tuple[pd.DataFrame, Dict[str, Any], bool]:
+    """
+    Pool worker: fit one series and forecast ``horizon`` days past it.
+
+    ``init`` warm-starts the optimiser from a previous fit. When the model
+    shape has moved on (more changepoints, a seasonality switched on by the
+    longer history) Stan rejects it and the series is fitted cold instead;
+    any other error propagates.
+    Returns the forecast, the new parameters and whether the warm start held.
+    """
+    # prophet and its Stan backend are heavy; only the workers need them
+    from prophet import Prophet
+
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+    (store, item), grp = series
+    train = grp[["ds", "y"]]
+    m, warm = None, False
+    if init is not None:
+        try:
+            m, warm = Prophet().fit(train, init=init), True
+        except (RuntimeError, ValueError) as exc:
+            # cmdstanpy: inits of the wrong size (ValueError) or an
+            # optimisation that fails from them (RuntimeError)
+            logger.info(
+                "%s / %s: warm start rejected, fitting cold: %s", store, item, exc
+            )
+            m = None
+    if m is None:
+        m = Prophet().fit(train)
+    fc = m.predict(m.make_future_dataframe(horizon))
+    out = fc[["ds", "yhat", "yhat_lower", "yhat_upper"]].assign(
+        store_name=store, item_name=item
+    )[FORECAST_COLUMNS]
+    return out, _stan_init(m), warm
+
+
+def iter_series(history: pd.DataFrame, min_points: int = 2) -> Iterable[Series]:
+    for key, grp in history.groupby(SERIES_KEY, sort=True, observed=True):
+        if len(grp) >= min_points:  # skip thin series
+            yield key, grp
+
+
+def series_fingerprint(grp: pd.DataFrame, until: Optional[pd.Timestamp] = None) -> str:
+    """
+    Content hash of one series' training rows, independent of row order;
+    with ``until``, of the rows up to that day only (a history prefix).
+    """
+    rows = grp.sort_values("ds")[["ds", "y"]]
+    if until is not None:
+        rows = rows[rows["ds"] <= until]
+    return hashlib.sha256(rows.to_csv(index=False).encode()).hexdigest()
+
+
+def cache_plan(
+    entry: Optional[Dict[str, Any]], grp: pd.DataFrame, horizon: int
+) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """
+    What the cached fit of one series is good for: (reuse its forecast,
+    parameters to warm-start a refit from). The entry is keyed by series and
+    records the fingerprint of everything it was trained on, up to last_ds.
+    If the current rows up to last_ds still hash the same, the past is
+    unchanged: the forecast is reused when no day was added (and the horizon
+    matches), otherwise the refit starts from the cached parameters. If the
+    past changed, the series is fitted from scratch.
+    """
+    if entry is None:
+        return False, None
+    last_ds = pd.Timestamp(entry["last_ds"])
+    if series_fingerprint(grp, until=last_ds) != entry["fingerprint"]:
+        return False, None
+    if grp["ds"].max() == last_ds and entry["horizon"] == horizon:
+        return True, None
+    return False, entry["params"]
+
+
+def _cache_file(cache_dir: Path, key: Tuple[str, str]) -> Path:
+    # names can hold anything; hash them rather than slugify (collisions)
+    digest = hashlib.sha1("\0".join(key).encode()).hexdigest()
+    return cache_dir / f"{digest}.json"
+
+
+def load_cached(cache_dir: Path, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(_cache_file(cache_dir, key).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def store_cached(
+    cache_dir: Path,
+    key: Tuple[str, str],
+    *,
+    fingerprint: str,
+    last_ds: pd.Timestamp,
+    horizon: int,
+    params: Dict[str, Any],
+    forecast: pd.DataFrame,
+) -> None:
+    entry = {
+        "store_name": key[0],
+        "item_name": key[1],
+        "fingerprint": fingerprint,
+        "last_ds": last_ds.date().isoformat(),
+        "horizon": horizon,
+        "params": params,
+        "forecast": {
+            "ds": forecast["ds"].dt.strftime("%Y-%m-%d").tolist(),
+            "yhat": forecast["yhat"].tolist(),
+            "yhat_lower": forecast["yhat_lower"].tolist(),
+            "yhat_upper": forecast["yhat_upper"].tolist(),
+        },
+    }
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = _cache_file(cache_dir, key)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(entry))
+    os.replace(tmp, path)
+
+
+def _cached_forecast(entry: Dict[str, Any]) -> pd.DataFrame:
+    fc = pd.DataFrame(entry["forecast"]).assign(
+        store_name=entry["store_name"], item_name=entry["item_name"]
+    )
+    fc["ds"] = pd.to_datetime(fc["ds"])
+    return fc[FORECAST_COLUMNS]
+
+
+def forecast_all(
+    history: pd.DataFrame,
+    *,
+    horizon: int = 30,
+    workers: Optional[int] = None,
+    min_points: int = 2,
+    cache_dir: Optional[Path] = None,
+) -> pd.DataFrame:
+    """
+    Fit every series in ``history`` across ``workers`` processes.
+
+    Returns one frame with FORECAST_COLUMNS, covering the history and
+    ``horizon`` future days of each series.
+
+    With ``cache_dir``, a series whose training rows and horizon match the
+    cached fit is not refitted at all; see cache_plan for the rest. The
+    cache is updated with every fit.
+    """
+    series = list(iter_series(history, min_points))
+    if not series:
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+
+    frames: List[pd.DataFrame] = []
+    todo: List[Series] = []
+    inits: List[Optional[Dict[str, Any]]] = []
+    fingerprints: List[str] = []
+    for key, grp in series:
+        entry = load_cached(cache_dir, key) if cache_dir else None
+        reuse, init = cache_plan(entry, grp, horizon)
+        if reuse:
+            frames.append(_cached_forecast(entry))
+            continue
+        todo.append((key, grp))
+        inits.append(init)
+        fingerprints.append(series_fingerprint(grp))
+
+    warm = 0
+    if todo:
+        workers = min(workers or os.cpu_count() or 1, len(todo))
+        # a few series per task keeps IPC overhead low without starving workers
+        chunksize = max(1, len(todo) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(
+                fit_series, todo, [horizon] * len(todo), inits, chunksize=chunksize
+            )
+            for (key, grp), fingerprint, (fc, params, was_warm) in zip(
+                todo, fingerprints, results
+            ):
+                frames.append(fc)
+                warm += was_warm
+                if cache_dir:
+                    store_cached(
+                        cache_dir,
+                        key,
+                        fingerprint=fingerprint,
+                        last_ds=grp["ds"].max(),
+                        horizon=horizon,
+                        params=params,
+                        forecast=fc,
+                    )
+
+    logger.info(
+        "%d series unchanged, %d refitted warm, %d fitted cold",
+        len(series) - len(todo),
+        warm,
+        len(todo) - warm,
+    )
+    return pd.concat(frames, ignore_index=True)
+
+
+def dense_matrix(
+    history: pd.DataFrame, min_points: int = 2
+) -> Tuple[pd.MultiIndex, pd.DatetimeIndex, np.ndarray]:
+    """
+    History as a (series x days) matrix over one shared calendar.
+
+    Days a series has no row for count as zero sales. Series with fewer than
+    ``min_points`` rows are dropped, as in the Prophet path.
+    """
+    counts = history.groupby(SERIES_KEY, observed=True).size()
+    keep = counts.index[counts >= min_points]
+    days = pd.date_range(history["ds"].min(), history["ds"].max(), freq="D")
+    pivot = (
+        history.pivot_table(
+            index=SERIES_KEY,
+            columns="ds",
+            values="y",
+            aggfunc="sum",
+            fill_value=0,
+            observed=True,
+        )
+        .reindex(index=keep, columns=days, fill_value=0)
+        .astype(np.float64)
+    )
+    return pivot.index, days, pivot.to_numpy()
+
+
+def forecast_all_hw(
+    history: pd.DataFrame, *, horizon: int = 30, min_points: int = 2
+) -> pd.DataFrame:
+    """
+    Holt-Winters baseline for every series in one vectorized pass.
+
+    Same FORECAST_COLUMNS as forecast_all, but only the ``horizon`` future
+    days (there is no in-sample fit to report).
+    """
+    if history.empty:
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+    keys, days, Y = dense_matrix(history, min_points)
+    if not len(keys):
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+
+    yhat, lower, upper = holt_winters_auto(Y, horizon)
+    future = pd.date_range(days[-1] + pd.Timedelta(days=1), periods=horizon)
+    n = len(keys)
+    return pd.DataFrame(
+        {
+            "store_name": np.repeat(keys.get_level_values(0), horizon),
+            "item_name": np.repeat(keys.get_level_values(1), horizon),
+            "ds": np.tile(future, n),
+            "yhat": yhat.ravel(),
+            "yhat_lower": lower.ravel(),
+            "yhat_upper": upper.ravel(),
+        }
+    )
+
+
+async def save_forecasts(
+    engine: AsyncEngine,
+    forecasts: pd.DataFrame,
+    *,
+    engine_name: str,
+    horizon: int,
+    history_start: date,
+    history_end: date,
+) -> uuid.UUID:
+    """
+    Store the future rows of ``forecasts`` as a new run and return its id.
+
+    The run row and its predictions go in one transaction, the predictions
+    through COPY, so readers never see a half-written run.
+    """
+    future = forecasts[forecasts["ds"] > pd.Timestamp(history_end)]
+    run_id = uuid.uuid4()
+    records = zip(
+        [run_id] * len(future),
+        future["store_name"].astype(str),
+        future["item_name"].astype(str),
+        future["ds"].dt.date,
+        future["yhat"].astype(float),
+        future["yhat_lower"].astype(float),
+        future["yhat_upper"].astype(float),
+    )
+    n_series = future.groupby(SERIES_KEY, observed=True).ngroups if len(future) else 0
+
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        pg = raw.driver_connection  # asyncpg.Connection
+        async with pg.transaction():
+            await pg.execute(
+                "INSERT INTO forecast_runs (id, engine, horizon, history_start, "
+                "history_end, series_count) VALUES ($1, $2, $3, $4, $5, $6)",
+                run_id,
+                engine_name,
+                horizon,
+                history_start,
+                history_end,
+                n_series,
+            )
+            await pg.copy_records_to_table(
+                "forecasts",
+                records=records,
+                columns=["run_id"] + FORECAST_COLUMNS,
+            )
+    return run_id
+
+
+def plot_forecasts(
+    history: pd.DataFrame, forecasts: pd.DataFrame, out_dir: Path
+) -> int:
+    """Write <out_dir>/<store>/<item>.png per forecast series; returns the count."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    observed = {key: grp for key, grp in history.groupby(SERIES_KEY, observed=True)}
+    n = 0
+    for (store, item), fc in forecasts.groupby(SERIES_KEY, observed=True):
+        # create nested folder per store once
+        store_dir = out_dir / slugify(store)
+        store_dir.mkdir(exist_ok=True)
+
+        fig, ax = plt.subplots(figsize=(10, 6))
+        hist = observed.get((store, item))
+        if hist is not None:
+            ax.plot(hist["ds"], hist["y"], "k.", label="observed")
+        ax.plot(fc["ds"], fc["yhat"], label="forecast")
+        ax.fill_between(fc["ds"], fc["yhat_lower"], fc["yhat_upper"], alpha=0.2)
+        ax.set_xlabel("Date")
+        ax.set_ylabel("Sales Qty")
+        fig.suptitle(f"{item} – {store}", fontsize=12)
+        fig.savefig(store_dir / f"{slugify(item)}.png")
+        plt.close(fig)
+        n += 1
+    return n
+
+
+def main(argv: Optional[List[str]] = None) -> pd.DataFrame:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, required=True)
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument(
+        "--engine", choices=("prophet", "holt-winters"), default="prophet"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--min-points", type=int, default=2)
+    parser.add_argument("--out", type=Path, help="write forecasts (.parquet/.csv)")
+    parser.add_argument("--plot-dir", type=Path, help="also render one PNG per series")
+    parser.add_argument("--cache-dir", type=Path, default=FORECAST_CACHE_DIR)
+    parser.add_argument(
+        "--no-cache", dest="cache_dir", action="store_const", const=None
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="store as a run served by /forecasts"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    async def _load() -> pd.DataFrame:
+        engine = get_async_engine()
+        try:
+            return await load_history(engine, args.start, args.end)
+        finally:
+            await engine.dispose()
+
+    async def _save(forecasts: pd.DataFrame) -> uuid.UUID:
+        engine = get_async_engine()
+        try:
+            # the window actually covered, which can be narrower than asked for
+            return await save_forecasts(
+                engine,
+                forecasts,
+                engine_name=args.engine,
+                horizon=args.horizon,
+                history_start=history["ds"].min().date(),
+                history_end=history["ds"].max().date(),
+            )
+        finally:
+            await engine.dispose()
+
+    history = asyncio.run(_load())
+    if args.engine == "holt-winters":
+        forecasts = forecast_all_hw(
+            history, horizon=args.horizon, min_points=args.min_points
+        )
+    else:
+        forecasts = forecast_all(
+            history,
+            horizon=args.horizon,
+            workers=args.workers,
+            min_points=args.min_points,
+            cache_dir=args.cache_dir,
+        )
+    n_series = forecasts.groupby(SERIES_KEY).ngroups if len(forecasts) else 0
+    print(f"Built {n_series} item-level forecasts from {len(history):,} rows.")
+
+    if args.out:
+        if args.out.suffix == ".csv":
+            forecasts.to_csv(args.out, index=False)
+        else:
+            forecasts.to_parquet(args.out, index=False)
+        print(f"Forecasts written to {args.out.resolve()}")
+    if args.save and not history.empty:
+        run_id = asyncio.run(_save(forecasts))
+        print(f"Saved forecast run {run_id}")
+    if args.plot_dir:
+        n = plot_forecasts(history, forecasts, args.plot_dir)
+        print(f"{n} plots saved to {args.plot_dir.resolve()}")
+    return forecasts
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Ingest many store workbooks at once: parse and clean in a process pool,
+write through a single COPY connection.
+
+Runs are incremental. A manifest records a content hash per source file
+and per sales_date inside it; unchanged files are not even parsed, and
+only new or changed days of a changed file are upserted on
+(sales_date, store_name, item_name). The rows a changed or dropped day
+had from that file are deleted first, so rows removed from a re-exported
+workbook do not linger. The manifest tables are created by Alembic.
+
+Usage
+-----
+$ python -m backend.app.ingest data/                    # every *.xlsx in data/
+$ python -m backend.app.ingest "exports/2025-*.xlsx" --workers 8
+$ python -m backend.app.ingest data/ --truncate         # full reload
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import glob
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+from sqlalchemy import (
+    BIGINT,
+    CHAR,
+    DATE,
+    TEXT,
+    TIMESTAMP,
+    Column,
+    ForeignKey,
+    Table,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.app.utils.db import get_async_engine
+from backend.app.xlsxtodb import (
+    COPY_CHUNK_ROWS,
+    SPLIT_DEFAULT_PARTITION,
+    concat_cleaned,
+    copy_into,
+    file_sha256,
+    iter_cleaned_chunks,
+    meta,
+    sales_table,
+)
+
+manifest_files = Table(
+    "sales_manifest_files",
+    meta,
+    Column("source", TEXT, primary_key=True),
+    Column("content_hash", CHAR(64), nullable=False),
+    Column("row_count", BIGINT, nullable=False),
+    Column(
+        "ingested_at",
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    ),
+)
+
+manifest_days = Table(
+    "sales_manifest_days",
+    meta,
+    Column(
+        "source",
+        TEXT,
+        ForeignKey("sales_manifest_files.source", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column("sales_date", DATE, primary_key=True),
+    Column("content_hash", CHAR(64), nullable=False),
+    # stores the source had rows for that day, the scope of its deletes
+    Column("store_names", ARRAY(TEXT), nullable=False, server_default=text("'{}'")),
+)
+
+# source -> (file hash, {sales_date: day hash})
+Manifest = Dict[str, Tuple[str, Dict[date, str]]]
+
+
+class ParsedWorkbook(NamedTuple):
+    file_hash: str
+    rows: int
+    # every day in the file; None when the file hash matched and it was skipped
+    day_hashes: Optional[Dict[date, str]]
+    day_stores: Optional[Dict[date, List[str]]]
+    # cleaned rows of the new or changed days only
+    frames: List[pd.DataFrame]
+    changed_days: int
+    parse_seconds: float
+
+
+class FileReport(NamedTuple):
+    path: str
+    rows: int
+    days: int
+    parse_seconds: float
+    write_seconds: float
+
+
+def expand_sources(sources: Sequence[str]) -> List[Path]:
+    """Directories, globs and plain paths -> sorted, de-duplicated workbooks."""
+    found = set()
+    for src in sources:
+        if os.path.isdir(src):
+            found.update(Path(src).glob("*.xlsx"))
+        elif glob.has_magic(src):
+            found.update(Path(p) for p in glob.glob(src))
+        else:
+            found.add(Path(src))
+    # skip Excel's "~$book.xlsx" lock files
+    return sorted({p.resolve() for p in found if not p.name.startswith("~$")})
+
+
+def day_hashes(df: pd.DataFrame) -> Dict[date, str]:
+    """Order-independent content hash of each sales_date's cleaned rows."""
+    cols = [c.name for c in sales_table.columns if c.name in df.columns]
+    out: Dict[date, str] = {}
+    for day, grp in df.groupby("sales_date", sort=True, observed=True):
+        grp = grp.sort_values(["store_name", "item_name"], kind="stable")
+        csv = grp.to_csv(columns=cols, header=False, index=False)
+        out[day.date()] = hashlib.sha256(csv.encode()).hexdigest()
+    return out
+
+
+def day_stores(df: pd.DataFrame) -> Dict[date, List[str]]:
+    """Store names present on each sales_date."""
+    grouped = df.groupby("sales_date", sort=True, observed=True)["store_name"]
+    return {
+        day.date(): sorted(str(s) for s in names.dropna().unique())
+        for day, names in grouped
+    }
+
+
+def stale_days(
+    parsed: ParsedWorkbook, known: Optional[Tuple[str, Dict[date, str]]]
+) -> List[date]:
+    """Days loaded from this source before that changed or are now gone."""
+    if known is None or parsed.day_hashes is None:
+        return []
+    return sorted(d for d, h in known[1].items() if parsed.day_hashes.get(d) != h)
+
+
+def parse_workbook(
+    path: str,
+    chunk_rows: int,
+    known: Optional[Tuple[str, Dict[date, str]]] = None,
+) -> ParsedWorkbook:
+    """
+    Pool worker: hash, read and clean one workbook, no database access.
+
+    ``known`` is the manifest entry from the previous run; matching days are
+    dropped here so they are never pickled back to the writer.
+    """
+    t0 = time.perf_counter()
+    file_hash = file_sha256(path)
+    if known is not None and known[0] == file_hash:
+        return ParsedWorkbook(file_hash, 0, None, None, [], 0, time.perf_counter() - t0)
+
+    chunks = list(iter_cleaned_chunks(path, chunk_rows, file_hash=file_hash))
+    if not chunks:
+        return ParsedWorkbook(file_hash, 0, {}, {}, [], 0, time.perf_counter() - t0)
+    df = concat_cleaned(chunks)
+    del chunks
+
+    rows = len(df)
+    days = day_hashes(df)
+    stores = day_stores(df)
+    seen = known[1] if known is not None else {}
+    changed = [d for d, h in days.items() if seen.get(d) != h]
+    if len(changed) < len(days):
+        df = df[df["sales_date"].isin(pd.to_datetime(changed))]
+    frames = [
+        df.iloc[start : start + chunk_rows] for start in range(0, len(df), chunk_rows)
+    ]
+    return ParsedWorkbook(
+        file_hash, rows, days, stores, frames, len(changed), time.perf_counter() - t0
+    )
+
+
+async def load_manifest(pg, sources: Sequence[str]) -> Manifest:
+    files = await pg.fetch(
+        "SELECT source, content_hash FROM sales_manifest_files "
+        "WHERE source = ANY($1::text[])",
+        list(sources),
+    )
+    days = await pg.fetch(
+        "SELECT source, sales_date, content_hash FROM sales_manifest_days "
+        "WHERE source = ANY($1::text[])",
+        list(sources),
+    )
+    out: Manifest = {r["source"]: (r["content_hash"], {}) for r in files}
+    for r in days:
+        out[r["source"]][1][r["sales_date"]] = r["content_hash"]
+    return out
+
+
+# The stores a source had on its stale days (from the manifest) plus the ones
+# its new export has on them: a re-export owns those (day, store) cells.
+DELETE_STALE_DAYS = """
+DELETE FROM sales s
+USING (
+    SELECT m.sales_date, unnest(m.store_names) AS store_name
+    FROM sales_manifest_days m
+    WHERE m.source = $1 AND m.sales_date = ANY($2::date[])
+    UNION
+    SELECT * FROM unnest($3::date[], $4::text[])
+) AS stale (sales_date, store_name)
+WHERE s.sales_date = stale.sales_date AND s.store_name = stale.store_name
+"""
+
+
+async def delete_stale_days(
+    pg, source: str, parsed: ParsedWorkbook, days: Sequence[date]
+) -> None:
+    """Delete what ``source`` loaded for ``days`` before they are re-merged."""
+    pairs = [(d, name) for d in days for name in (parsed.day_stores or {}).get(d, [])]
+    await pg.execute(
+        DELETE_STALE_DAYS,
+        source,
+        list(days),
+        [d for d, _ in pairs],
+        [name for _, name in pairs],
+    )
+
+
+async def record_manifest(pg, source: str, parsed: ParsedWorkbook) -> None:
+    await pg.execute(
+        "INSERT INTO sales_manifest_files (source, content_hash, row_count) "
+        "VALUES ($1, $2, $3) "
+        "ON CONFLICT (source) DO UPDATE SET content_hash = EXCLUDED.content_hash, "
+        "row_count = EXCLUDED.row_count, ingested_at = now()",
+        source,
+        parsed.file_hash,
+        parsed.rows,
+    )
+    await pg.execute("DELETE FROM sales_manifest_days WHERE source = $1", source)
+    await pg.copy_records_to_table(
+        "sales_manifest_days",
+        records=[
+            (source, d, h, parsed.day_stores.get(d, []))
+            for d, h in parsed.day_hashes.items()
+        ],
+        columns=["source", "sales_date", "content_hash", "store_names"],
+    )
+
+
+async def ingest_workbooks(
+    paths: Sequence[Path],
+    engine: AsyncEngine,
+    *,
+    workers: int,
+    truncate: bool = False,
+    chunk_rows: int = COPY_CHUNK_ROWS,
+) -> List[FileReport]:
+    """
+    Parse ``paths`` in ``workers`` processes and upsert each one as it finishes.
+
+    Writes go through one connection and one transaction, so a run is
+    all-or-nothing. At most two parsed workbooks per worker wait for the
+    writer, which bounds memory when parsing outruns the database.
+    ``truncate`` empties sales and the manifest first, reloading everything.
+    """
+    loop = asyncio.get_running_loop()
+    reports: List[FileReport] = []
+    todo = iter(paths)
+    pending: dict = {}
+
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        pg = raw.driver_connection  # asyncpg.Connection
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            async with pg.transaction():
+                if truncate:
+                    await pg.execute(
+                        f"TRUNCATE {sales_table.name}, "
+                        f"{manifest_files.name}, {manifest_days.name}"
+                    )
+                    known: Manifest = {}
+                else:
+                    known = await load_manifest(pg, [str(p) for p in paths])
+
+                def refill() -> None:
+                    while len(pending) < 2 * workers:
+                        path = next(todo, None)
+                        if path is None:
+                            return
+                        fut = loop.run_in_executor(
+                            pool,
+                            parse_workbook,
+                            str(path),
+                            chunk_rows,
+                            known.get(str(path)),
+                        )
+                        pending[fut] = path
+
+                refill()
+                while pending:
+                    done, _ = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for fut in done:
+                        path = pending.pop(fut)
+                        parsed = fut.result()
+                        t0 = time.perf_counter()
+                        rows = 0
+                        if parsed.day_hashes is not None:
+                            stale = stale_days(parsed, known.get(str(path)))
+                            if stale:
+                                await delete_stale_days(pg, str(path), parsed, stale)
+                            rows = await copy_into(pg, parsed.frames, upsert=True)
+                            await record_manifest(pg, str(path), parsed)
+                        report = FileReport(
+                            str(path),
+                            rows,
+                            parsed.changed_days,
+                            parsed.parse_seconds,
+                            time.perf_counter() - t0,
+                        )
+                        reports.append(report)
+                        print(
+                            f"{report.path}: "
+                            + (
+                                f"{report.rows:,} rows in {report.days} day(s), "
+                                if parsed.day_hashes is not None
+                                else "unchanged, "
+                            )
+                            + f"parse {report.parse_seconds:.2f}s, "
+                            f"write {report.write_seconds:.2f}s"
+                        )
+                    refill()
+
+                await pg.execute(SPLIT_DEFAULT_PARTITION)
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("sources", nargs="+", help="workbooks, directories or globs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--truncate", action="store_true")
+    parser.add_argument("--chunk-rows", type=int, default=COPY_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    paths = expand_sources(args.sources)
+    if not paths:
+        parser.error("no workbooks matched")
+
+    async def main() -> List[FileReport]:
+        engine = get_async_engine()
+        try:
+            return await ingest_workbooks(
+                paths,
+                engine,
+                workers=min(args.workers, len(paths)),
+                truncate=args.truncate,
+                chunk_rows=args.chunk_rows,
+            )
+        finally:
+            await engine.dispose()
+
+    t0 = time.perf_counter()
+    reports = asyncio.run(main())
+    elapsed = time.perf_counter() - t0
+    total = sum(r.rows for r in reports)
+    print(
+        f"Loaded {total:,} rows from {len(reports)} workbook(s) "
+        f"in {elapsed:.2f}s ({total / elapsed:,.0f} rows/s)"
+    )
@@ -3,7 +3,15 @@ import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routers import inventory_router, item_router, store_router, user_router
+from .routers import (
+    LAZY_ROUTERS,
+    inventory_router,
+    item_router,
+    load_router,
+    store_router,
+    user_router,
+)
+from .utils.db import LAZY_INIT
 
 app = FastAPI(
     title="Happippang API",
@@ -11,6 +19,34 @@ app = FastAPI(
 )
 
 
+class LazyRouters:
+    """
+    Include each LAZY_ROUTERS entry on the first request under its prefix,
+    or all of them when the OpenAPI schema is asked for, so the docs stay
+    complete. Runs before routing, so that same request is served.
+    """
+
+    def __init__(self, asgi_app, target: FastAPI):
+        self.app = asgi_app
+        self.target = target
+        self.pending = set(LAZY_ROUTERS)
+
+    async def __call__(self, scope, receive, send):
+        if self.pending and scope["type"] in ("http", "websocket"):
+            path = scope["path"]
+            root = scope.get("root_path", "")
+            if root and path.startswith(root):
+                path = path[len(root) :]
+            for prefix in sorted(self.pending):
+                if path in (prefix, self.target.openapi_url) or path.startswith(
+                    prefix + "/"
+                ):
+                    self.pending.discard(prefix)
+                    self.target.include_router(load_router(prefix))
+                    self.target.openapi_schema = None
+        await self.app(scope, receive, send)
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Next.js dev server
@@ -18,6 +54,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if LAZY_INIT:
+    app.add_middleware(LazyRouters, target=app)
 
 
 @app.get("/")
@@ -29,3 +67,6 @@ app.include_router(store_router)
 app.include_router(item_router)
 app.include_router(inventory_router)
 app.include_router(user_router)
+if not LAZY_INIT:
+    for prefix in LAZY_ROUTERS:
+        app.include_router(load_router(prefix))
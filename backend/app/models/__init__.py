@@ -1,7 +1,20 @@
+from .forecast import Forecast, ForecastRun
 from .inventory import Inventory
+from .inventory_rollup import InventoryRollup
 from .item import Item
+from .recompute_job import RecomputeJob
 from .store import Store
 from .token import Token
 from .user import User
 
-__all__ = ["User", "Inventory", "Store", "Item", "Token"]
+__all__ = [
+    "User",
+    "Inventory",
+    "InventoryRollup",
+    "Store",
+    "Item",
+    "Token",
+    "RecomputeJob",
+    "ForecastRun",
+    "Forecast",
+]
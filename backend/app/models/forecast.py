@@ -0,0 +1,42 @@
+import uuid
+
+from sqlalchemy import Column, Date, Float, ForeignKey, Index, Integer, String, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from backend.app.utils.db import Base
+
+from .mixin import TimestampMixin
+
+
+# One forecasting run (backend/app/forecasting.py --save). Runs are never
+# updated after they are written, which is what lets the /forecasts router
+# cache and ETag them by id.
+class ForecastRun(Base, TimestampMixin):
+    __tablename__ = "forecast_runs"
+    __table_args__ = (Index("ix_forecast_runs_created_at", "created_at"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    engine = Column(String(32), nullable=False)  # "prophet" | "holt-winters"
+    horizon = Column(Integer, nullable=False)
+    history_start = Column(Date, nullable=False)
+    history_end = Column(Date, nullable=False)
+    series_count = Column(Integer, nullable=False, server_default=text("0"))
+
+
+# Daily predictions of one run per (store_name, item_name), keyed like the
+# sales table they were trained on.
+class Forecast(Base):
+    __tablename__ = "forecasts"
+
+    run_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("forecast_runs.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    store_name = Column(String(120), primary_key=True)
+    item_name = Column(String(120), primary_key=True)
+    ds = Column(Date, primary_key=True)
+
+    yhat = Column(Float, nullable=False)
+    yhat_lower = Column(Float, nullable=False)
+    yhat_upper = Column(Float, nullable=False)
@@ -7,11 +7,12 @@ from sqlalchemy import (
     Column,
     Date,
     ForeignKey,
+    Index,
     Integer,
     UniqueConstraint,
     text,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 
 from backend.app.utils.db import Base
 
@@ -24,12 +25,13 @@ class Inventory(Base, TimestampMixin):
         UniqueConstraint(
             "store_id", "item_id", "date", name="uix_inventory_store_item_date"
         ),
+        # date-major scans per store (history reads, keyset pagination)
+        Index("ix_inventory_store_date_item", "store_id", "date", "item_id"),
         CheckConstraint("db >= 0", name="chk_db_nonneg"),
         CheckConstraint("pg >= 0", name="chk_pg_nonneg"),
         CheckConstraint("waste >= 0", name="chk_waste_nonneg"),
         CheckConstraint("rem >= 0", name="chk_rem_nonneg"),
-        CheckConstraint("b0_end >= 0", name="chk_b0_nonneg"),
-        CheckConstraint("b1_end >= 0", name="chk_b1_nonneg"),
+        CheckConstraint("0 <= ALL(buckets)", name="chk_buckets_nonneg"),
     )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -53,16 +55,13 @@ class Inventory(Base, TimestampMixin):
     db = Column(Integer, nullable=False, server_default=text("0"))  # qty_in
     pg = Column(Integer, nullable=False, server_default=text("0"))  # qty_out
 
-    # derived (3-day shelf life FIFO)
+    # derived (FIFO over Item.shelf_life_days)
     waste = Column(
         Integer, nullable=False, server_default=text("0")
     )  # expired at end of day
     rem = Column(
         Integer, nullable=False, server_default=text("0")
     )  # end-of-day live stock
-    b0_end = Column(
-        Integer, nullable=False, server_default=text("0")
-    )  # today's leftover (age 0)
-    b1_end = Column(
-        Integer, nullable=False, server_default=text("0")
-    )  # yesterday's leftover (age 1)
+    buckets = Column(
+        ARRAY(Integer), nullable=False, server_default=text("'{}'")
+    )  # end-of-day leftover by age, shelf_life_days - 1 slots (age 0 first)
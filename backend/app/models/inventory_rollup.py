@@ -0,0 +1,28 @@
+from sqlalchemy import BigInteger, Column, Date, ForeignKey, Integer, String, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from backend.app.utils.db import Base
+
+from .mixin import TimestampMixin
+
+
+# Per-store, per-category daily totals of `inventories`, kept current by the
+# inventory write and propagation paths for the (store, date) cells they touch.
+class InventoryRollup(Base, TimestampMixin):
+    __tablename__ = "inventory_daily_rollups"
+
+    store_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("stores.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    category = Column(String(100), primary_key=True)
+    date = Column(Date, primary_key=True)
+
+    db = Column(Integer, nullable=False, server_default=text("0"))
+    pg = Column(Integer, nullable=False, server_default=text("0"))
+    waste = Column(Integer, nullable=False, server_default=text("0"))
+    rem = Column(Integer, nullable=False, server_default=text("0"))
+    waste_value = Column(
+        BigInteger, nullable=False, server_default=text("0")
+    )  # sum(waste * items.cost)
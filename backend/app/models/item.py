@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import CheckConstraint, Column, Integer, String, text
 from sqlalchemy.dialects.postgresql import UUID
 
 from backend.app.utils.db import Base
@@ -10,8 +10,14 @@ from .mixin import TimestampMixin
 
 class Item(Base, TimestampMixin):
     __tablename__ = "items"
+    __table_args__ = (
+        CheckConstraint("shelf_life_days >= 1", name="chk_shelf_life_pos"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(100), nullable=False, index=True)
     category = Column(String(100), nullable=False, index=True)
     cost = Column(Integer(), nullable=False)
+    shelf_life_days = Column(
+        Integer, nullable=False, server_default=text("3")
+    )  # days an item can be sold, delivery day included
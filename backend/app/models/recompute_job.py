@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Date, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+
+from backend.app.utils.db import Base
+
+from .mixin import TimestampMixin
+
+
+# Pending forward recompute per (store, item), written by the "deferred"
+# bulk mode and drained by the recompute worker. Repeated submissions
+# coalesce into one row.
+class RecomputeJob(Base, TimestampMixin):
+    __tablename__ = "inventory_recompute_queue"
+
+    store_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("stores.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    item_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("items.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    start_date = Column(Date, nullable=False)  # earliest day to recompute from
+    dirty_until = Column(Date, nullable=False)  # latest submitted day + 1
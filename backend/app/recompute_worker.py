@@ -0,0 +1,41 @@
+"""
+Drain the inventory recompute queue filled by the "deferred" bulk mode.
+
+Usage
+-----
+$ python -m backend.app.recompute_worker              # drain until empty
+$ python -m backend.app.recompute_worker --follow     # keep polling
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from backend.app.services.inventory import drain_recompute_queue
+from backend.app.utils.db import get_session_maker
+
+
+async def run(batch_size: int, follow: bool, poll_seconds: float) -> int:
+    total = 0
+    while True:
+        async with get_session_maker()() as session:
+            done = await drain_recompute_queue(session, batch_size=batch_size)
+        total += done
+        if done:
+            print(f"Recomputed {done} queued item(s) ({total} total)")
+            continue
+        if not follow:
+            return total
+        await asyncio.sleep(poll_seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--follow", action="store_true")
+    parser.add_argument("--poll-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    total = asyncio.run(run(args.batch_size, args.follow, args.poll_seconds))
+    print(f"Queue drained, {total} job(s) processed.")
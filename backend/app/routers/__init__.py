@@ -1,11 +1,35 @@
+from importlib import import_module
+
+from fastapi import APIRouter
+
 from .inventory import router as inventory_router
 from .item import router as item_router
 from .store import router as store_router
 from .user import router as user_router
 
+# Rarely hit routers, by URL prefix. With LAZY_INIT, main.py imports them
+# on the first request under their prefix instead of at startup.
+LAZY_ROUTERS = {
+    "/forecasts": f"{__name__}.forecast",
+}
+
+
+def load_router(prefix: str) -> APIRouter:
+    return import_module(LAZY_ROUTERS[prefix]).router
+
+
+def __getattr__(name: str) -> APIRouter:
+    if name == "forecast_router":
+        return load_router("/forecasts")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "store_router",
     "item_router",
     "inventory_router",
     "user_router",
+    "forecast_router",
+    "LAZY_ROUTERS",
+    "load_router",
 ]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.schemas.forecast import ForecastOut, ForecastRunOut
+from backend.app.services.forecast import (
+    forecast_body,
+    forecast_etag,
+    latest_run_id,
+    list_runs,
+)
+from backend.app.utils.db import get_session
+
+router = APIRouter(prefix="/forecasts", tags=["forecasts"])
+
+# A run id never changes content; "latest" can move to a newer run.
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+@router.get("/runs", response_model=List[ForecastRunOut])
+async def list_forecast_runs(
+    limit: int = Query(20, ge=1, le=200),
+    session: AsyncSession = Depends(get_session),
+):
+    return await list_runs(session, limit=limit)
+
+
+@router.get("/", response_model=List[ForecastOut])
+async def get_forecasts(
+    request: Request,
+    run_id: Optional[UUID] = None,  # defaults to the latest run
+    store_name: Optional[str] = None,
+    item_name: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+):
+    """Stored predictions; never triggers model work. Honors If-None-Match."""
+    cache_control = IMMUTABLE
+    if run_id is None:
+        run_id = await latest_run_id(session)
+        if run_id is None:
+            raise HTTPException(status_code=404, detail="no forecast runs yet")
+        cache_control = REVALIDATE
+
+    etag = forecast_etag(run_id, store_name, item_name)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    body = await forecast_body(session, run_id, store_name, item_name)
+    if body is None:
+        raise HTTPException(status_code=404, detail="forecast run not found")
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,14 +1,31 @@
 from __future__ import annotations
 
-from typing import List, Literal, Optional
+from datetime import date as date_type
+from typing import AsyncIterator, List, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.app.schemas.inventory import InventoryBulkCreate, InventoryOut
-from backend.app.utils.db import get_session
-
-# from backend.app.services.inventory_service import bulk_upsert_inventory
+from backend.app.schemas.inventory import (
+    DeliveryRecommendationOut,
+    InventoryBulkCreate,
+    InventoryOut,
+    InventoryPage,
+    InventoryRangeCreate,
+    InventoryRollupOut,
+)
+from backend.app.services.inventory import (
+    Mode,
+    bulk_upsert_inventory,
+    bulk_upsert_inventory_range,
+    decode_cursor,
+    list_inventory_page,
+    list_rollups,
+    stream_inventory,
+)
+from backend.app.utils.db import get_session, get_session_maker
 
 router = APIRouter(prefix="/inventories", tags=["inventories"])
 
@@ -21,12 +38,122 @@ router = APIRouter(prefix="/inventories", tags=["inventories"])
 async def bulk_create_inventories(
     payload: InventoryBulkCreate,
     session: AsyncSession = Depends(get_session),
-    mode: Optional[Literal["propagate", "freeze"]] = None,  # query param override
+    mode: Optional[Mode] = None,  # query param override
 ):
     if not payload.items:
         raise HTTPException(status_code=400, detail="items list cannot be empty")
 
-    # rows = await bulk_upsert_inventory(session, payload, mode=mode)
-    # if not rows:
-    #     raise HTTPException(status_code=400, detail="all rows were zero")
-    # return rows
+    rows = await bulk_upsert_inventory(session, payload, mode=mode)
+    if not rows:
+        raise HTTPException(status_code=400, detail="all rows were zero")
+    return rows
+
+
+@router.post(
+    "/range",
+    response_model=List[InventoryOut],
+    status_code=status.HTTP_201_CREATED,
+)
+async def range_create_inventories(
+    payload: InventoryRangeCreate,
+    session: AsyncSession = Depends(get_session),
+    mode: Optional[Mode] = None,  # query param override
+):
+    if not payload.items:
+        raise HTTPException(status_code=400, detail="items list cannot be empty")
+
+    rows = await bulk_upsert_inventory_range(session, payload, mode=mode)
+    if not rows:
+        raise HTTPException(status_code=400, detail="all rows were zero")
+    return rows
+
+
+@router.get("/", response_model=InventoryPage)
+async def list_inventories(
+    store_id: UUID,
+    item_id: Optional[List[UUID]] = Query(None),
+    start: Optional[date_type] = None,
+    end: Optional[date_type] = None,
+    after: Optional[str] = None,  # next_cursor from the previous page
+    limit: int = Query(200, ge=1, le=1000),
+    session: AsyncSession = Depends(get_session),
+):
+    try:
+        cursor = decode_cursor(after) if after else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+    rows, next_cursor = await list_inventory_page(
+        session,
+        store_id=store_id,
+        item_ids=item_id,
+        start_date=start,
+        end_date=end,
+        after=cursor,
+        limit=limit,
+    )
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+@router.get("/rollups", response_model=List[InventoryRollupOut])
+async def list_inventory_rollups(
+    store_id: UUID,
+    start: Optional[date_type] = None,
+    end: Optional[date_type] = None,
+    session: AsyncSession = Depends(get_session),
+):
+    return await list_rollups(session, store_id, start_date=start, end_date=end)
+
+
+@router.get("/recommendations", response_model=List[DeliveryRecommendationOut])
+async def recommend_inventory_deliveries(
+    store_id: UUID,
+    date: date_type,
+    item_id: Optional[List[UUID]] = Query(None),
+    max_stockout: float = Query(0.05, ge=0, le=1),
+    lookback: int = Query(56, ge=14, le=365),  # days of pg history to forecast from
+    session: AsyncSession = Depends(get_session),
+):
+    """Delivery quantity per item minimizing expected waste cost for `date`."""
+    # imported on first use: it pulls in the forecasting stack, which no
+    # other inventory endpoint needs, and would otherwise slow cold starts
+    from backend.app.services.delivery import recommend_deliveries
+
+    return await recommend_deliveries(
+        session,
+        store_id,
+        date,
+        item_ids=item_id,
+        max_stockout=max_stockout,
+        lookback_days=lookback,
+    )
+
+
+@router.get("/export")
+async def export_inventories(
+    store_id: UUID,
+    item_id: Optional[List[UUID]] = Query(None),
+    start: Optional[date_type] = None,
+    end: Optional[date_type] = None,
+):
+    """Whole range as NDJSON, one InventoryOut per line, streamed."""
+
+    async def ndjson() -> AsyncIterator[str]:
+        # Own session: it must stay open for as long as the body streams
+        async with get_session_maker()() as session:
+            async for chunk in stream_inventory(
+                session,
+                store_id=store_id,
+                item_ids=item_id,
+                start_date=start,
+                end_date=end,
+            ):
+                yield "".join(
+                    InventoryOut.model_validate(
+                        r, from_attributes=True
+                    ).model_dump_json()
+                    + "\n"
+                    for r in chunk
+                )
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
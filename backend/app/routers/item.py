@@ -6,6 +6,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.models.item import Item
 from backend.app.schemas.item import ItemCreate, ItemOut, ItemUpdate
+from backend.app.services.inventory import (
+    enqueue_item_history,
+    item_rollup_cells,
+    rebuild_rollup_cells,
+)
 from backend.app.utils.db import get_session
 
 router = APIRouter(prefix="/items", tags=["items"])
@@ -38,26 +43,33 @@ async def get_item(item_id: UUID, db: AsyncSession = Depends(get_session)):
 async def update_item(
     item_id: UUID, data: ItemUpdate, db: AsyncSession = Depends(get_session)
 ):
-    stmt = (
-        update(Item)
-        .where(Item.id == item_id)
-        .values(**data.model_dump(exclude_none=True))
-        .returning(Item)
+    values = data.model_dump(exclude_none=True)
+    shelf_life = await db.scalar(
+        select(Item.shelf_life_days).where(Item.id == item_id).with_for_update()
     )
+    stmt = update(Item).where(Item.id == item_id).values(**values).returning(Item)
     res = await db.execute(stmt)
-    await db.commit()
     row = res.scalar_one_or_none()
     if not row:
         raise HTTPException(404, "Item not found")
+    if row.shelf_life_days != shelf_life:
+        # stored buckets were filled for the old shelf life
+        await enqueue_item_history(db, item_id)
+    if "cost" in values or "category" in values:
+        # waste_value and the category split in the rollups depend on both
+        await rebuild_rollup_cells(db, await item_rollup_cells(db, item_id))
+    await db.commit()
     return row
 
 
 @router.delete("/{item_id}", response_model=ItemOut)
 async def delete_item(item_id: UUID, db: AsyncSession = Depends(get_session)):
+    cells = await item_rollup_cells(db, item_id)  # its rows go with it
     stmt = delete(Item).where(Item.id == item_id).returning(Item)
     res = await db.execute(stmt)
     row = res.scalar_one_or_none()
-    await db.commit()
     if not row:
         raise HTTPException(404, "Item not found")
+    await rebuild_rollup_cells(db, cells)
+    await db.commit()
     return row
@@ -2,7 +2,6 @@ import os
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from jose import JWTError, jwt
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.models.user import User
@@ -11,6 +10,7 @@ from backend.app.services.auth import (
     authenticate_user,
     create_access_pair,
     get_current_user,
+    get_user_by_username,
     hash_password,
     is_refresh_token_revoked,
     revoke_refresh_token,
@@ -26,8 +26,7 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 @router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
 async def register(user: UserCreate, db: AsyncSession = Depends(get_session)):
-    res = await db.execute(select(User).where(User.username == user.username))
-    if res.scalar_one_or_none():
+    if await get_user_by_username(db, user.username):
         raise HTTPException(
             status.HTTP_400_BAD_REQUEST, detail="Username already taken"
         )
@@ -75,8 +74,9 @@ async def refresh_token_route(
 
     new_access, new_refresh = create_access_pair(username)
 
-    user_res = await db.execute(select(User).where(User.username == username))
-    user = user_res.scalar_one()
+    user = await get_user_by_username(db, username)
+    if user is None:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED)
 
     await store_refresh_token(db, user.id, new_refresh)
 
@@ -1,5 +1,13 @@
 # app/schemas/__init__.py
-from .inventory import InventoryBulkCreate, InventoryOut
+from .forecast import ForecastOut, ForecastRunOut
+from .inventory import (
+    DeliveryRecommendationOut,
+    InventoryBulkCreate,
+    InventoryOut,
+    InventoryPage,
+    InventoryRangeCreate,
+    InventoryRollupOut,
+)
 from .item import ItemCreate, ItemOut, ItemUpdate
 from .store import StoreCreate, StoreOut, StoreUpdate
 from .token import RefreshToken, Token
@@ -16,7 +24,14 @@ __all__ = [
     "ItemOut",
     # Inventory
     "InventoryBulkCreate",
+    "InventoryRangeCreate",
     "InventoryOut",
+    "InventoryPage",
+    "InventoryRollupOut",
+    "DeliveryRecommendationOut",
+    # Forecast
+    "ForecastRunOut",
+    "ForecastOut",
     # User
     "User",
     "UserCreate",
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from datetime import date as date_type
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class ForecastRunOut(BaseModel):
+    id: UUID
+    engine: str
+    horizon: int
+    history_start: date_type
+    history_end: date_type
+    series_count: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ForecastOut(BaseModel):
+    store_name: str
+    item_name: str
+    ds: date_type
+    yhat: float
+    yhat_lower: float
+    yhat_upper: float
+
+    class Config:
+        from_attributes = True
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
 from datetime import date as date_type
-from typing import List, Literal
+from typing import List, Literal, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+# Caps on one range submission; the service simulates a dense
+# items x days block, so its size has to stay bounded.
+MAX_RANGE_DAYS = 92
+MAX_RANGE_ITEMS = 20_000  # entries in `items`
+MAX_RANGE_CELLS = 500_000  # distinct items x days
 
 
 class InventoryItemIn(BaseModel):
@@ -18,7 +24,36 @@ class InventoryBulkCreate(BaseModel):
     date: date_type
     items: List[InventoryItemIn]
     # Optional: request-time behavior; can also be a query param
-    mode: Literal["propagate", "freeze"] = "propagate"
+    mode: Literal["propagate", "freeze", "deferred"] = "propagate"
+
+
+class InventoryRangeItemIn(InventoryItemIn):
+    date: date_type
+
+
+class InventoryRangeCreate(BaseModel):
+    store_id: UUID
+    start_date: date_type
+    end_date: date_type
+    items: List[InventoryRangeItemIn] = Field(max_length=MAX_RANGE_ITEMS)
+    mode: Literal["propagate", "freeze", "deferred"] = "propagate"
+
+    @model_validator(mode="after")
+    def _dates_inside_range(self) -> "InventoryRangeCreate":
+        if self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        days = (self.end_date - self.start_date).days + 1
+        if days > MAX_RANGE_DAYS:
+            raise ValueError(f"range spans {days} days, at most {MAX_RANGE_DAYS}")
+        n_items = len({it.item_id for it in self.items})
+        if n_items * days > MAX_RANGE_CELLS:
+            raise ValueError(
+                f"{n_items} items x {days} days is over {MAX_RANGE_CELLS} cells"
+            )
+        for it in self.items:
+            if not (self.start_date <= it.date <= self.end_date):
+                raise ValueError(f"item date {it.date} is outside the range")
+        return self
 
 
 class InventoryOut(BaseModel):
@@ -30,11 +65,43 @@ class InventoryOut(BaseModel):
     pg: int
     waste: int
     rem: int
-    b0_end: int
-    b1_end: int
+    buckets: List[int]
 
     class Config:  # Pydantic v1
         orm_mode = True
 
     # For Pydantic v2, use:
     # model_config = {"from_attributes": True}
+
+
+class InventoryPage(BaseModel):
+    items: List[InventoryOut]
+    # pass back as `after` to get the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+
+class InventoryRollupOut(BaseModel):
+    store_id: UUID
+    category: str
+    date: date_type
+    db: int
+    pg: int
+    waste: int
+    rem: int
+    waste_value: int
+
+    class Config:
+        from_attributes = True
+
+
+class DeliveryRecommendationOut(BaseModel):
+    item_id: UUID
+    date: date_type
+    shelf_life_days: int
+    on_hand: int  # carried-in stock at the start of the day
+    forecast_demand: float  # expected pg on the day
+    recommended_db: int
+    # over the batch's shelf life, averaged across demand scenarios
+    expected_waste: float
+    expected_waste_cost: float
+    stockout_probability: float  # chance the day's demand exceeds stock
@@ -1,11 +1,13 @@
-from pydantic import BaseModel
 from uuid import UUID
 
+from pydantic import BaseModel, Field
+
 
 class ItemBase(BaseModel):
     name: str
     category: str
     cost: int
+    shelf_life_days: int = Field(3, ge=1)
 
 
 class ItemCreate(ItemBase):
@@ -16,6 +18,7 @@ class ItemUpdate(BaseModel):
     name: str | None = None
     category: str | None = None
     cost: int | None = None
+    shelf_life_days: int | None = Field(None, ge=1)
 
 
 class ItemOut(ItemBase):
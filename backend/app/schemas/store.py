@@ -1,7 +1,8 @@
 # app/schemas/store.py
-from pydantic import BaseModel, Field
 from uuid import UUID
 
+from pydantic import BaseModel, Field
+
 
 class StoreBase(BaseModel):
     name: str
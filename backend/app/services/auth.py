@@ -1,18 +1,17 @@
 import logging
 import os
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from passlib.exc import UnknownHashError
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.models import Token, User
-from backend.app.utils.db import get_session
+from backend.app.utils.db import LAZY_INIT, get_session
 
 # ---------------------- Logging setup ----------------------
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
@@ -49,19 +48,37 @@ logger.info(
     },
 )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 
+@lru_cache
+def get_pwd_context():
+    # passlib and its bcrypt backend load here, not at import (see LAZY_INIT)
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+if not LAZY_INIT:
+    get_pwd_context()
+
+# Hit on every login, refresh and authenticated request: built once so the
+# engine's compiled cache and asyncpg's prepared statements are reused.
+_USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+_TOKEN_BY_VALUE = select(Token).where(Token.token == bindparam("token"))
+
+
 def hash_password(password: str) -> str:
     logger.debug("hash_password called")
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     logger.debug("verify_password called")
+    from passlib.exc import UnknownHashError
+
     try:
-        ok = pwd_context.verify(plain_password, hashed_password)
+        ok = get_pwd_context().verify(plain_password, hashed_password)
         logger.debug("verify_password result", extra={"ok": ok})
         return ok
     except UnknownHashError:
@@ -164,9 +181,14 @@ async def store_refresh_token(db: AsyncSession, user_id: str, token: str) -> Non
     await db.commit()
 
 
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    res = await db.execute(_USER_BY_USERNAME, {"username": username})
+    return res.scalar_one_or_none()
+
+
 async def revoke_refresh_token(db: AsyncSession, token: str) -> None:
     logger.info("revoke_refresh_token", extra={"rt_preview": _mask_token(token)})
-    res = await db.execute(select(Token).where(Token.token == token))
+    res = await db.execute(_TOKEN_BY_VALUE, {"token": token})
     row = res.scalar_one_or_none()
     if row:
         row.revoked = True
@@ -178,7 +200,7 @@ async def revoke_refresh_token(db: AsyncSession, token: str) -> None:
 
 async def is_refresh_token_revoked(db: AsyncSession, token: str) -> bool:
     logger.debug("is_refresh_token_revoked", extra={"rt_preview": _mask_token(token)})
-    res = await db.execute(select(Token).where(Token.token == token))
+    res = await db.execute(_TOKEN_BY_VALUE, {"token": token})
     row = res.scalar_one_or_none()
     revoked = row.revoked if row else True
     logger.debug("revocation check result", extra={"revoked": revoked})
@@ -188,8 +210,7 @@ async def is_refresh_token_revoked(db: AsyncSession, token: str) -> bool:
 async def authenticate_user(db: AsyncSession, username: str, password: str):
     logger.info("authenticate_user start", extra={"username": username})
     try:
-        result = await db.execute(select(User).where(User.username == username))
-        user = result.scalar_one_or_none()
+        user = await get_user_by_username(db, username)
         logger.debug("user lookup", extra={"found": bool(user)})
         if not user:
             logger.warning("user not found", extra={"username": username})
@@ -229,8 +250,7 @@ async def get_current_user(
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid token")
 
     try:
-        result = await db.execute(select(User).where(User.username == username))
-        user = result.scalar_one_or_none()
+        user = await get_user_by_username(db, username)
     except Exception:
         logger.exception("DB error fetching user for token")
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "DB error")
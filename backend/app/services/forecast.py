@@ -0,0 +1,196 @@
+"""
+Additive Holt-Winters with weekly seasonality, vectorized across series.
+
+Everything works on a dense (series x days) matrix: one pass over the days
+updates the level, trend and seasonal state of every series at once, so a
+year of a thousand-odd store/item series forecasts in a fraction of a
+second. Numpy only, so the API can use it without pandas or Prophet.
+
+Also the read side of stored forecast runs for the /forecasts router.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from collections import OrderedDict
+from itertools import product
+from typing import List, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+import numpy as np
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models.forecast import Forecast, ForecastRun
+from backend.app.schemas.forecast import ForecastOut
+
+SEASON = 7  # days
+Z80 = 1.2815515655446004  # two-sided 80% band, Prophet's default width
+
+# Smoothing parameters tried for every series; holt_winters_auto keeps the
+# combination with the lowest in-sample one-step squared error per series.
+DEFAULT_GRID: Sequence[Tuple[float, float, float]] = tuple(
+    product((0.1, 0.3, 0.6), (0.0, 0.05), (0.05, 0.2, 0.4))
+)
+
+Param = Union[float, np.ndarray]
+
+
+def holt_winters(
+    Y: np.ndarray,
+    horizon: int,
+    alpha: Param,
+    beta: Param,
+    gamma: Param,
+    season: int = SEASON,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Fit and forecast every row of ``Y`` (series x days).
+
+    ``alpha``/``beta``/``gamma`` are scalars or one value per series.
+    Returns ``(forecast (series x horizon), sigma, sse)`` where sigma is the
+    standard deviation of the one-step errors and sse their sum of squares,
+    both counted after the first season used for initialisation.
+    """
+    Y = np.asarray(Y, dtype=np.float64)
+    n, days = Y.shape
+    alpha, beta, gamma = (np.broadcast_to(p, (n,)) for p in (alpha, beta, gamma))
+
+    if days >= season:
+        level = Y[:, :season].mean(axis=1)
+        seasonal = Y[:, :season] - level[:, None]
+    else:
+        level = Y.mean(axis=1) if days else np.zeros(n)
+        seasonal = np.zeros((n, season))
+    if days >= 2 * season:
+        trend = (Y[:, season : 2 * season].mean(axis=1) - level) / season
+    else:
+        trend = np.zeros(n)
+
+    sse = np.zeros(n)
+    counted = 0
+    for t in range(days):
+        s = t % season
+        y = Y[:, t]
+        if t >= season:
+            err = y - (level + trend + seasonal[:, s])
+            sse += err * err
+            counted += 1
+        prev = level
+        level = alpha * (y - seasonal[:, s]) + (1 - alpha) * (level + trend)
+        trend = beta * (level - prev) + (1 - beta) * trend
+        seasonal[:, s] = gamma * (y - level) + (1 - gamma) * seasonal[:, s]
+
+    h = np.arange(1, horizon + 1)
+    forecast = (
+        level[:, None]
+        + h[None, :] * trend[:, None]
+        + seasonal[:, (days + h - 1) % season]
+    )
+    sigma = np.sqrt(sse / counted) if counted else np.zeros(n)
+    return forecast, sigma, sse
+
+
+def holt_winters_auto(
+    Y: np.ndarray,
+    horizon: int,
+    grid: Sequence[Tuple[float, float, float]] = DEFAULT_GRID,
+    season: int = SEASON,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Holt-Winters with per-series parameters picked from ``grid``.
+
+    Every (series, parameter set) pair runs in the same vectorized pass, then
+    each series keeps its best set. Forecasts are clipped at zero since they
+    are quantities. Returns ``(yhat, yhat_lower, yhat_upper)``, each
+    series x horizon, with an 80% band widening as sqrt(h).
+    """
+    Y = np.asarray(Y, dtype=np.float64)
+    n = Y.shape[0]
+    g = len(grid)
+    params = np.asarray(grid, dtype=np.float64)
+
+    tiled = np.tile(Y, (g, 1))  # row k * n + i = series i under grid[k]
+    alpha, beta, gamma = (np.repeat(params[:, j], n) for j in range(3))
+    forecast, sigma, sse = holt_winters(tiled, horizon, alpha, beta, gamma, season)
+
+    best = sse.reshape(g, n).argmin(axis=0)
+    rows = best * n + np.arange(n)
+    yhat = forecast[rows]
+    band = Z80 * sigma[rows, None] * np.sqrt(np.arange(1, horizon + 1))[None, :]
+    return (
+        np.clip(yhat, 0, None),
+        np.clip(yhat - band, 0, None),
+        np.clip(yhat + band, 0, None),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Stored runs
+# ---------------------------------------------------------------------------
+
+# Serialized /forecasts bodies keyed by (run id, store, item). Runs are
+# immutable, so entries never go stale; the bound only caps memory.
+FORECAST_CACHE_ENTRIES = int(os.getenv("FORECAST_CACHE_ENTRIES", "256"))
+_BodyKey = Tuple[UUID, Optional[str], Optional[str]]
+_bodies: "OrderedDict[_BodyKey, bytes]" = OrderedDict()
+_forecast_list = TypeAdapter(List[ForecastOut])
+
+
+async def list_runs(session: AsyncSession, limit: int = 20) -> List[ForecastRun]:
+    res = await session.execute(
+        select(ForecastRun).order_by(ForecastRun.created_at.desc()).limit(limit)
+    )
+    return list(res.scalars())
+
+
+async def latest_run_id(session: AsyncSession) -> Optional[UUID]:
+    return await session.scalar(
+        select(ForecastRun.id).order_by(ForecastRun.created_at.desc()).limit(1)
+    )
+
+
+def forecast_etag(
+    run_id: UUID, store_name: Optional[str], item_name: Optional[str]
+) -> str:
+    """Strong ETag for one filtered view of a run; no rows needed to build it."""
+    view = f"{store_name or ''}\0{item_name or ''}".encode()
+    return f'"{run_id}-{hashlib.sha1(view).hexdigest()[:16]}"'
+
+
+async def forecast_body(
+    session: AsyncSession,
+    run_id: UUID,
+    store_name: Optional[str] = None,
+    item_name: Optional[str] = None,
+) -> Optional[bytes]:
+    """
+    JSON list of ForecastOut for one run, optionally narrowed to a store
+    and/or item; None when the run does not exist. Served from the
+    in-process cache after the first request.
+    """
+    key = (run_id, store_name, item_name)
+    body = _bodies.get(key)
+    if body is not None:
+        _bodies.move_to_end(key)
+        return body
+
+    if await session.get(ForecastRun, run_id) is None:
+        return None
+    stmt = select(Forecast).where(Forecast.run_id == run_id)
+    if store_name is not None:
+        stmt = stmt.where(Forecast.store_name == store_name)
+    if item_name is not None:
+        stmt = stmt.where(Forecast.item_name == item_name)
+    stmt = stmt.order_by(Forecast.store_name, Forecast.item_name, Forecast.ds)
+    rows = (await session.execute(stmt)).scalars().all()
+
+    body = _forecast_list.dump_json(
+        [ForecastOut.model_validate(r, from_attributes=True) for r in rows]
+    )
+    _bodies[key] = body
+    if len(_bodies) > FORECAST_CACHE_ENTRIES:
+        _bodies.popitem(last=False)
+    return body
@@ -1,112 +1,678 @@
 from __future__ import annotations
 
+import os
 from datetime import date as date_type
 from datetime import timedelta
-from typing import Dict, List, Literal, Optional, Tuple
+from typing import (
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 from uuid import UUID
 
-from sqlalchemy import and_, select
+import numpy as np
+from sqlalchemy import (
+    Boolean,
+    Date,
+    Integer,
+    and_,
+    any_,
+    bindparam,
+    func,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import distinct_on
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.models.inventory import Inventory
-from backend.app.schemas.inventory import InventoryBulkCreate, InventoryItemIn
+from backend.app.models.inventory_rollup import InventoryRollup
+from backend.app.models.item import Item
+from backend.app.models.recompute_job import RecomputeJob
+from backend.app.schemas.inventory import (
+    InventoryBulkCreate,
+    InventoryItemIn,
+    InventoryRangeCreate,
+)
 
-Mode = Literal["propagate", "freeze"]
+Mode = Literal["propagate", "freeze", "deferred"]
+Backend = Literal["python", "postgres"]
 
+# Where forward propagation runs: in this process ("python") or inside
+# Postgres via the inventory_propagate() PL/pgSQL function ("postgres").
+PROPAGATION_BACKEND = os.getenv("INVENTORY_PROPAGATION_BACKEND", "python")
 
-def _fifo_step(prev_b0_end: int, prev_b1_end: int, db_qty: int, pg_qty: int) -> dict:
+_PROPAGATE_PG = text(
+    "SELECT inventory_propagate(:store_id, :item_ids, :seeds, :start_date, :converge)"
+).bindparams(
+    bindparam("item_ids", type_=ARRAY(PG_UUID(as_uuid=True))),
+    bindparam("seeds", type_=ARRAY(Integer, dimensions=2)),
+    bindparam("converge", type_=Boolean),
+)
+
+Buckets = List[int]
+
+DEFAULT_SHELF_LIFE = 3
+
+# Hot statements, built once at import: the compiled form is cached by the
+# engine and the server-side prepared one by asyncpg per connection (see
+# utils/db.py), so repeated requests only bind parameters.
+
+# Nearest earlier row per item inside the shelf-life horizon (_seed_state).
+_SEED_STATE = (
+    select(Inventory.item_id, Inventory.date, Inventory.buckets)
+    .where(
+        and_(
+            Inventory.store_id == bindparam("store_id"),
+            # = ANY(array) keeps one statement text for any number of items
+            Inventory.item_id
+            == any_(bindparam("item_ids", type_=ARRAY(PG_UUID(as_uuid=True)))),
+            Inventory.date < bindparam("day"),
+            Inventory.date >= bindparam("since"),
+        )
+    )
+    .ext(distinct_on(Inventory.item_id))
+    .order_by(Inventory.item_id, Inventory.date.desc())
+)
+
+_upsert = pg_insert(Inventory)
+_UPSERT_ROWS = (
+    _upsert.on_conflict_do_update(
+        index_elements=[Inventory.store_id, Inventory.item_id, Inventory.date],
+        set_={
+            "db": _upsert.excluded.db,
+            "pg": _upsert.excluded.pg,
+            "waste": _upsert.excluded.waste,
+            "rem": _upsert.excluded.rem,
+            "buckets": _upsert.excluded.buckets,
+        },
+    ).returning(Inventory)
+    # rows already in the session must pick up the upserted values
+    .execution_options(populate_existing=True)
+)
+
+
+def _fifo_step(
+    prev_buckets: Buckets, db_qty: int, pg_qty: int, shelf_life: int = 3
+) -> dict:
     """
-    3-day shelf life, FIFO sell order: age-2 -> age-1 -> today.
-    Leftover age-2 becomes waste. rem = r1 + r0.
+    N-day shelf life, FIFO sell order: oldest -> ... -> age-1 -> today.
+    `prev_buckets[k]` is stock that is k+1 days old today (shelf_life - 1
+    buckets). Leftover at age shelf_life - 1 becomes waste; rem = sum of
+    what is carried to tomorrow. With shelf_life=3 the buckets are the
+    former (b0_end, b1_end).
     """
-    use2 = min(pg_qty, prev_b1_end)
-    l2_after = prev_b1_end - use2
-    p = pg_qty - use2
-    use1 = min(p, prev_b0_end)
-    r1 = prev_b0_end - use1
-    p = p - use1
-    use0 = min(p, db_qty)
-    r0 = db_qty - use0
+    n = shelf_life - 1
+    stock = [db_qty] + (list(prev_buckets) + [0] * n)[:n]  # index = age
+    p = pg_qty
+    for age in range(n, -1, -1):
+        use = min(p, stock[age])
+        stock[age] -= use
+        p -= use
 
+    buckets = stock[:n]
     return {
-        "waste": l2_after,
-        "rem": r1 + r0,
-        "b0_end": r0,  # today's leftover → tomorrow's age-1
-        "b1_end": r1,  # yesterday's leftover → tomorrow's age-2
+        "waste": stock[n],
+        "rem": sum(buckets),
+        "buckets": buckets,  # buckets[k] -> age k+1 tomorrow
+    }
+
+
+def _fifo_batch(
+    prev_buckets: np.ndarray,
+    db_qty: np.ndarray,
+    pg_qty: np.ndarray,
+    shelf_life: np.ndarray,
+    gap_days: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized `_fifo_step` over an items x days block, mixed shelf lives.
+
+    `prev_buckets` is the carry state before the first day, shape
+    (items, W) with W = max(shelf_life) - 1; items with a shorter life are
+    zero-padded on the right. `db_qty`/`pg_qty` are (items, days) and
+    `shelf_life` is (items,). `gap_days` (items, days) is the number of
+    silent calendar days to roll before each column; without it columns
+    are consecutive days and a missing day can be passed as 0/0. Silent
+    days are jumped in O(1) by shifting the buckets.
+    Days are walked in order (each depends on the last), all items at once.
+    Returns (waste, rem) shaped (items, days) and buckets (items, days, W).
+    """
+    db = np.asarray(db_qty, dtype=np.int64)
+    pg = np.asarray(pg_qty, dtype=np.int64)
+    life = np.asarray(shelf_life, dtype=np.int64)
+    n_items, n_days = db.shape
+    width = int(life.max()) - 1 if n_items else 0
+    state = np.zeros((n_items, width), dtype=np.int64)
+    prev = np.asarray(prev_buckets, dtype=np.int64).reshape(n_items, -1)
+    state[:, : min(width, prev.shape[1])] = prev[:, :width]
+    gap = None if gap_days is None else np.asarray(gap_days, dtype=np.int64)
+
+    rows = np.arange(n_items)
+    ages = np.arange(width)
+    live = ages[None, :] < (life - 1)[:, None]  # buckets each item can hold
+    waste = np.empty_like(db)
+    rem = np.empty_like(db)
+    buckets = np.empty((n_items, n_days, width), dtype=np.int64)
+
+    for d in range(n_days):
+        if gap is not None:
+            src = ages[None, :] - gap[:, d : d + 1]
+            shifted = np.take_along_axis(state, np.clip(src, 0, None), axis=1)
+            state = np.where((src >= 0) & live, shifted, 0)
+
+        stock = np.concatenate([db[:, d : d + 1], state], axis=1)  # col = age
+        p = pg[:, d].copy()
+        for age in range(width, -1, -1):
+            use = np.minimum(p, stock[:, age])
+            stock[:, age] -= use
+            p -= use
+
+        waste[:, d] = stock[rows, life - 1]
+        stock[rows, life - 1] = 0
+        state = stock[:, :width]
+        rem[:, d] = state.sum(axis=1)
+        buckets[:, d, :] = state
+
+    return waste, rem, buckets
+
+
+def _normalize(buckets: Optional[Buckets], shelf_life: int) -> Buckets:
+    """Stored bucket array resized to the item's current shelf life."""
+    n = shelf_life - 1
+    return (list(buckets or []) + [0] * n)[:n]
+
+
+def _roll_silent(buckets: Buckets, days: int) -> Buckets:
+    """Carry state after `days` silent calendar days (db = pg = 0)."""
+    if days <= 0:
+        return list(buckets)
+    return ([0] * days + list(buckets))[: len(buckets)]
+
+
+async def _shelf_lives(session: AsyncSession, item_ids: List[UUID]) -> Dict[UUID, int]:
+    result = await session.execute(
+        select(Item.id, Item.shelf_life_days).where(Item.id.in_(item_ids))
+    )
+    lives = {r.id: r.shelf_life_days or DEFAULT_SHELF_LIFE for r in result}
+    return {item_id: lives.get(item_id, DEFAULT_SHELF_LIFE) for item_id in item_ids}
+
+
+async def _seed_state(
+    session: AsyncSession,
+    store_id: UUID,
+    shelf_life: Dict[UUID, int],
+    day: date_type,
+) -> Dict[UUID, Buckets]:
+    """
+    Buckets carried into `day` for each item in `shelf_life`, with one
+    indexed DISTINCT ON lookup of the nearest earlier row. A missing
+    previous day is rolled forward silently from the row before it instead
+    of being treated as empty. Nothing older than shelf_life - 1 days can
+    still hold stock, so that is the search horizon; items with no row
+    inside it start empty.
+    """
+    horizon = max(shelf_life.values()) - 1
+    params = {
+        "store_id": store_id,
+        "item_ids": list(shelf_life),
+        "day": day,
+        "since": day - timedelta(days=horizon),
     }
+    seeds = {item_id: _normalize(None, n) for item_id, n in shelf_life.items()}
+    for r in await session.execute(_SEED_STATE, params):
+        seeds[r.item_id] = _roll_silent(
+            _normalize(r.buckets, shelf_life[r.item_id]), (day - r.date).days - 1
+        )
+    return seeds
+
+
+def _padded(seeds: Dict[UUID, Buckets], item_ids: List[UUID]) -> List[Buckets]:
+    """Seeds as a rectangular list, zero-padded to the widest item."""
+    width = max((len(seeds[item_id]) for item_id in item_ids), default=0)
+    return [
+        seeds[item_id] + [0] * (width - len(seeds[item_id])) for item_id in item_ids
+    ]
+
+
+# Rows fetched per item in the first propagation round; doubles each round.
+_WINDOW_ROWS = 8
+_MAX_WINDOW_ROWS = 512
+
+# The next `window` rows of each item from its own start day: one index
+# range scan per item (uix_inventory_store_item_date) that stops at the
+# LIMIT, and one statement text for any number of items.
+_WINDOW_ROWS_SQL = text(
+    """
+    SELECT w.*
+    FROM unnest(CAST(:item_ids AS uuid[]), CAST(:starts AS date[]))
+        AS c(item_id, start_date)
+    CROSS JOIN LATERAL (
+        SELECT i.id, i.item_id, i.date, i.db, i.pg, i.waste, i.rem, i.buckets
+        FROM inventories i
+        WHERE i.store_id = :store_id
+          AND i.item_id = c.item_id
+          AND i.date >= c.start_date
+          AND (CAST(:end_date AS date) IS NULL OR i.date <= :end_date)
+        ORDER BY i.date
+        LIMIT :window
+    ) w
+    ORDER BY w.item_id, w.date
+    """
+).bindparams(
+    bindparam("item_ids", type_=ARRAY(PG_UUID(as_uuid=True))),
+    bindparam("starts", type_=ARRAY(Date)),
+    bindparam("end_date", type_=Date),
+    bindparam("window", type_=Integer),
+)
 
 
-async def _recompute_from(
+async def _propagate_forward(
     session: AsyncSession,
     store_id: UUID,
-    item_id: UUID,
+    seeds: Dict[UUID, Buckets],
     start_date: date_type,
     end_date: Optional[date_type] = None,
+    converge: bool = True,
+    converge_from: Optional[date_type] = None,
+) -> Set[date_type]:
+    """
+    Recompute derived fields from `start_date` forward for several items.
+
+    `seeds` maps item_id -> buckets carried into `start_date`; its length
+    is the item's shelf life - 1. Rows are pulled for all still-active
+    items at once, in per-item windows that double every round, and run
+    through the batched FIFO engine with gaps jumped in O(1). With
+    `converge`, an item stops at the first row whose recomputed buckets
+    equal the stored ones: every later row was derived from that same
+    state. `converge_from` holds that check off for earlier rows whose
+    successors are known to be stale. Pass converge=False to walk (and
+    repair) the whole remaining history.
+    Only changed rows are written back, with one executemany UPDATE.
+    Does NOT create new rows. Returns the dates of the rows it updated.
+    """
+    life = {item_id: len(b) + 1 for item_id, b in seeds.items()}
+    # item_id -> (first day not yet simulated, buckets)
+    carry: Dict[UUID, Tuple[date_type, Buckets]] = {
+        item_id: (start_date, b) for item_id, b in seeds.items()
+    }
+    changed = []
+    changed_dates: Set[date_type] = set()
+    window = _WINDOW_ROWS
+
+    while carry:
+        params = {
+            "store_id": store_id,
+            "item_ids": list(carry),
+            "starts": [cur for cur, _ in carry.values()],
+            "end_date": end_date,
+            "window": window,
+        }
+        rows_by_item: Dict[UUID, list] = {}
+        for r in await session.execute(_WINDOW_ROWS_SQL, params):
+            rows_by_item.setdefault(r.item_id, []).append(r)
+        if not rows_by_item:
+            break
+
+        # Row-compact items x k block; gap = silent days before each row
+        item_ids = list(rows_by_item)
+        width = max(len(v) for v in rows_by_item.values())
+        db = np.zeros((len(item_ids), width), dtype=np.int64)
+        pg = np.zeros_like(db)
+        gap = np.zeros_like(db)
+        for i, item_id in enumerate(item_ids):
+            cur = carry[item_id][0]
+            for k, r in enumerate(rows_by_item[item_id]):
+                db[i, k] = r.db or 0
+                pg[i, k] = r.pg or 0
+                gap[i, k] = (r.date - cur).days
+                cur = r.date + timedelta(days=1)
+
+        waste, rem, buckets = _fifo_batch(
+            prev_buckets=_padded({x: carry[x][1] for x in item_ids}, item_ids),
+            db_qty=db,
+            pg_qty=pg,
+            shelf_life=[life[item_id] for item_id in item_ids],
+            gap_days=gap,
+        )
+
+        next_carry = {}
+        for i, item_id in enumerate(item_ids):
+            item_rows = rows_by_item[item_id]
+            n = life[item_id] - 1
+            done = len(item_rows) < window  # reached the end of history
+            for k, r in enumerate(item_rows):
+                res_buckets = [int(x) for x in buckets[i, k, :n]]
+                res = (int(waste[i, k]), int(rem[i, k]), res_buckets)
+                if res != (r.waste, r.rem, list(r.buckets or [])):
+                    changed_dates.add(r.date)
+                    changed.append(
+                        {
+                            "id": r.id,
+                            "waste": res[0],
+                            "rem": res[1],
+                            "buckets": res_buckets,
+                        }
+                    )
+                if (
+                    converge
+                    and (converge_from is None or r.date >= converge_from)
+                    and res_buckets == _normalize(r.buckets, n + 1)
+                ):
+                    done = True
+                    break
+            if not done:
+                k = len(item_rows) - 1
+                next_carry[item_id] = (
+                    item_rows[k].date + timedelta(days=1),
+                    [int(x) for x in buckets[i, k, :n]],
+                )
+
+        carry = next_carry
+        window = min(window * 2, _MAX_WINDOW_ROWS)
+
+    if changed:
+        # ORM bulk UPDATE by primary key -> a single executemany
+        await session.execute(update(Inventory), changed)
+    return changed_dates
+
+
+async def _propagate_forward_pg(
+    session: AsyncSession,
+    store_id: UUID,
+    seeds: Dict[UUID, Buckets],
+    start_date: date_type,
+    converge: bool = True,
+) -> Set[date_type]:
+    """
+    Same contract as `_propagate_forward`, but the roll forward runs inside
+    Postgres so future rows never leave the database.
+    """
+    if not seeds:
+        return set()
+
+    item_ids = list(seeds)
+    result = await session.execute(
+        _PROPAGATE_PG,
+        {
+            "store_id": store_id,
+            "item_ids": item_ids,
+            # Postgres arrays must be rectangular; the function trims per item
+            "seeds": [b or [0] for b in _padded(seeds, item_ids)],
+            "start_date": start_date,
+            "converge": converge,
+        },
+    )
+    return set(result.scalars())
+
+
+async def _enqueue_recompute(
+    session: AsyncSession,
+    store_id: UUID,
+    item_ids: List[UUID],
+    start_date: date_type,
 ) -> None:
     """
-    Recompute derived fields forward starting at `start_date` for one item.
-    Does NOT create new rows; gaps are simulated silently to roll buckets.
+    Queue a forward recompute from `start_date` for each item. An existing
+    job for the same (store, item) keeps the earliest start and the latest
+    dirty day, so back-to-back corrections collapse into one pass.
     """
-    prev_date = start_date - timedelta(days=1)
-    prev = await session.execute(
-        select(Inventory.b0_end, Inventory.b1_end).where(
-            and_(
-                Inventory.store_id == store_id,
-                Inventory.item_id == item_id,
-                Inventory.date == prev_date,
-            )
+    base = pg_insert(RecomputeJob).values(
+        [
+            {
+                "store_id": store_id,
+                "item_id": item_id,
+                "start_date": start_date,
+                "dirty_until": start_date,
+            }
+            for item_id in item_ids
+        ]
+    )
+    stmt = base.on_conflict_do_update(
+        index_elements=[RecomputeJob.store_id, RecomputeJob.item_id],
+        set_={
+            "start_date": func.least(RecomputeJob.start_date, base.excluded.start_date),
+            "dirty_until": func.greatest(
+                RecomputeJob.dirty_until, base.excluded.dirty_until
+            ),
+            "updated_at": func.now(),
+        },
+    )
+    await session.execute(stmt)
+
+
+async def enqueue_item_history(session: AsyncSession, item_id: UUID) -> None:
+    """
+    Queue a recompute of `item_id`'s whole history in every store that has
+    one, with convergence held off to the end (dirty_until past the last
+    row). Needed when its shelf life changes: stored buckets were sized for
+    the old life, and once zero-padded they can equal a recomputed state
+    and stop a converging pass early.
+    """
+    select_history = (
+        select(
+            Inventory.store_id,
+            Inventory.item_id,
+            func.min(Inventory.date),
+            func.max(Inventory.date) + 1,
         )
+        .where(Inventory.item_id == item_id)
+        .group_by(Inventory.store_id, Inventory.item_id)
     )
-    row = prev.first()
-    b0_prev, b1_prev = (row[0], row[1]) if row else (0, 0)
+    base = pg_insert(RecomputeJob).from_select(
+        ["store_id", "item_id", "start_date", "dirty_until"], select_history
+    )
+    stmt = base.on_conflict_do_update(
+        index_elements=[RecomputeJob.store_id, RecomputeJob.item_id],
+        set_={
+            "start_date": func.least(RecomputeJob.start_date, base.excluded.start_date),
+            "dirty_until": func.greatest(
+                RecomputeJob.dirty_until, base.excluded.dirty_until
+            ),
+            "updated_at": func.now(),
+        },
+    )
+    await session.execute(stmt)
 
-    q = (
-        select(Inventory)
-        .where(
-            and_(
-                Inventory.store_id == store_id,
-                Inventory.item_id == item_id,
-                Inventory.date >= start_date,
-                (Inventory.date <= end_date) if end_date else True,
-            )
+
+async def drain_recompute_queue(session: AsyncSession, batch_size: int = 200) -> int:
+    """
+    Run up to `batch_size` queued recomputes, oldest first, and commit.
+    Jobs are claimed with SKIP LOCKED so several workers can drain at once.
+    Returns the number of jobs processed (0 when the queue is empty).
+    """
+    result = await session.execute(
+        select(RecomputeJob)
+        .order_by(RecomputeJob.created_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    jobs: List[RecomputeJob] = list(result.scalars())
+    if not jobs:
+        return 0
+
+    groups: Dict[Tuple[UUID, date_type, date_type], List[UUID]] = {}
+    for job in jobs:
+        key = (job.store_id, job.start_date, job.dirty_until)
+        groups.setdefault(key, []).append(job.item_id)
+
+    for (store_id, start_date, dirty_until), item_ids in groups.items():
+        shelf_life = await _shelf_lives(session, item_ids)
+        seeds = await _seed_state(session, store_id, shelf_life, start_date)
+        # Rows before dirty_until may sit behind an unpropagated write, so
+        # convergence is only trusted from there on.
+        changed_dates = await _propagate_forward(
+            session,
+            store_id=store_id,
+            seeds=seeds,
+            start_date=start_date,
+            converge_from=dirty_until,
         )
-        .order_by(Inventory.date.asc())
-    )
-    result = await session.execute(q)
-    rows: List[Inventory] = list(result.scalars())
-
-    cur_date = start_date
-    for r in rows:
-        # roll across missing calendar days without persisting (db=0, pg=0)
-        while cur_date < r.date:
-            silent = _fifo_step(b0_prev, b1_prev, db_qty=0, pg_qty=0)
-            b0_prev, b1_prev = silent["b0_end"], silent["b1_end"]
-            cur_date += timedelta(days=1)
-
-        # recompute this row
-        res = _fifo_step(b0_prev, b1_prev, db_qty=r.db or 0, pg_qty=r.pg or 0)
-        if (
-            r.waste != res["waste"]
-            or r.rem != res["rem"]
-            or r.b0_end != res["b0_end"]
-            or r.b1_end != res["b1_end"]
-        ):
-            r.waste = res["waste"]
-            r.rem = res["rem"]
-            r.b0_end = res["b0_end"]
-            r.b1_end = res["b1_end"]
-
-        b0_prev, b1_prev = r.b0_end, r.b1_end
-        cur_date = r.date + timedelta(days=1)
+        await _refresh_rollups(session, store_id, changed_dates)
+
+    for job in jobs:
+        await session.delete(job)
+    await session.commit()
+    return len(jobs)
+
+
+async def _upsert_rows(session: AsyncSession, records: List[dict]) -> List[Inventory]:
+    """
+    Insert-or-update fully computed rows. `records` are bound as an
+    executemany of `_UPSERT_ROWS` (batched into multi-row VALUES by
+    SQLAlchemy), so the statement text does not vary with the row count.
+    """
+    result = await session.execute(_UPSERT_ROWS, records)
+    return list(result.scalars())
+
+
+_REFRESH_ROLLUPS = text(
+    """
+    INSERT INTO inventory_daily_rollups
+        (store_id, category, date, db, pg, waste, rem, waste_value)
+    SELECT i.store_id, it.category, i.date,
+           sum(i.db), sum(i.pg), sum(i.waste), sum(i.rem),
+           sum(i.waste::bigint * it.cost)
+    FROM inventories i
+    JOIN items it ON it.id = i.item_id
+    WHERE i.store_id = :store_id AND i.date = ANY(:dates)
+    GROUP BY i.store_id, it.category, i.date
+    ON CONFLICT (store_id, category, date) DO UPDATE
+    SET db = excluded.db,
+        pg = excluded.pg,
+        waste = excluded.waste,
+        rem = excluded.rem,
+        waste_value = excluded.waste_value,
+        updated_at = now()
+    """
+).bindparams(bindparam("dates", type_=ARRAY(Date)))
+
+
+async def _refresh_rollups(
+    session: AsyncSession, store_id: UUID, dates: Iterable[date_type]
+) -> None:
+    """Re-aggregate the rollup cells of `store_id` for `dates` only."""
+    dates = sorted(set(dates))
+    if dates:
+        await session.execute(_REFRESH_ROLLUPS, {"store_id": store_id, "dates": dates})
+
+
+# An item's cost and category feed waste_value and the category split, so
+# editing or deleting it re-aggregates every (store, date) cell it is in.
+# Cells are cleared first: after a category move the old category's row
+# may have nothing left to aggregate.
+_ITEM_ROLLUP_CELLS = text(
+    "SELECT DISTINCT store_id, date FROM inventories WHERE item_id = :item_id"
+)
+
+_CLEAR_ROLLUP_CELLS = text(
+    """
+    DELETE FROM inventory_daily_rollups r
+    USING unnest(CAST(:store_ids AS uuid[]), CAST(:dates AS date[]))
+        AS c(store_id, date)
+    WHERE r.store_id = c.store_id AND r.date = c.date
+    """
+).bindparams(
+    bindparam("store_ids", type_=ARRAY(PG_UUID(as_uuid=True))),
+    bindparam("dates", type_=ARRAY(Date)),
+)
+
+_FILL_ROLLUP_CELLS = text(
+    """
+    INSERT INTO inventory_daily_rollups
+        (store_id, category, date, db, pg, waste, rem, waste_value)
+    SELECT i.store_id, it.category, i.date,
+           sum(i.db), sum(i.pg), sum(i.waste), sum(i.rem),
+           sum(i.waste::bigint * it.cost)
+    FROM unnest(CAST(:store_ids AS uuid[]), CAST(:dates AS date[]))
+        AS c(store_id, date)
+    JOIN inventories i ON i.store_id = c.store_id AND i.date = c.date
+    JOIN items it ON it.id = i.item_id
+    GROUP BY i.store_id, it.category, i.date
+    """
+).bindparams(
+    bindparam("store_ids", type_=ARRAY(PG_UUID(as_uuid=True))),
+    bindparam("dates", type_=ARRAY(Date)),
+)
+
+
+async def item_rollup_cells(
+    session: AsyncSession, item_id: UUID
+) -> List[Tuple[UUID, date_type]]:
+    """The (store, date) rollup cells `item_id` contributes to."""
+    result = await session.execute(_ITEM_ROLLUP_CELLS, {"item_id": item_id})
+    return [(r.store_id, r.date) for r in result]
+
+
+async def rebuild_rollup_cells(
+    session: AsyncSession, cells: Sequence[Tuple[UUID, date_type]]
+) -> None:
+    """Re-aggregate whole (store, date) cells, every category in them."""
+    if not cells:
+        return
+    params = {
+        "store_ids": [store_id for store_id, _ in cells],
+        "dates": [day for _, day in cells],
+    }
+    await session.execute(_CLEAR_ROLLUP_CELLS, params)
+    await session.execute(_FILL_ROLLUP_CELLS, params)
+
+
+async def _after_write(
+    session: AsyncSession,
+    store_id: UUID,
+    seeds: Dict[UUID, Buckets],
+    start_date: date_type,
+    mode: Mode,
+    backend: Backend,
+) -> Set[date_type]:
+    """
+    Propagate or queue the forward recompute after a write.
+    Returns the dates propagation changed (empty unless mode="propagate").
+
+    "freeze" leaves later rows untouched for now but still queues their
+    repair: they were derived from the old state of the written day, so a
+    converging pass could otherwise stop before reaching them.
+    """
+    if mode == "propagate":
+        propagate = (
+            _propagate_forward_pg if backend == "postgres" else _propagate_forward
+        )
+        return await propagate(
+            session,
+            store_id=store_id,
+            seeds=seeds,
+            start_date=start_date,
+        )
+    if mode in ("deferred", "freeze"):
+        await _enqueue_recompute(
+            session,
+            store_id=store_id,
+            item_ids=list(seeds),
+            start_date=start_date,
+        )
+    return set()
 
 
 async def bulk_upsert_inventory(
     session: AsyncSession,
     payload: InventoryBulkCreate,
     mode: Optional[Mode] = None,  # explicit override beats payload.mode
+    backend: Optional[Backend] = None,  # defaults to PROPAGATION_BACKEND
 ) -> List[Inventory]:
     mode = mode or getattr(payload, "mode", "propagate")
+    backend = backend or PROPAGATION_BACKEND
 
     # Keep only rows with movement (db or pg > 0)
     active_items: List[InventoryItemIn] = [
@@ -116,68 +682,253 @@ async def bulk_upsert_inventory(
         return []
 
     item_ids = [it.item_id for it in active_items]
-    prev_date = payload.date - timedelta(days=1)
+    shelf_life = await _shelf_lives(session, item_ids)
+
+    # One indexed lookup for the starting buckets
+    prev_map = await _seed_state(session, payload.store_id, shelf_life, payload.date)
+
+    # Compute derived fields for day D, all items in one pass
+    waste, rem, buckets = _fifo_batch(
+        prev_buckets=_padded(prev_map, item_ids),
+        db_qty=[[it.db] for it in active_items],
+        pg_qty=[[it.pg] for it in active_items],
+        shelf_life=[shelf_life[item_id] for item_id in item_ids],
+    )
+    records = [
+        {
+            "store_id": payload.store_id,
+            "item_id": it.item_id,
+            "date": payload.date,
+            "db": it.db,
+            "pg": it.pg,
+            "waste": int(waste[i, 0]),
+            "rem": int(rem[i, 0]),
+            "buckets": [int(x) for x in buckets[i, 0, : shelf_life[it.item_id] - 1]],
+        }
+        for i, it in enumerate(active_items)
+    ]
+
+    # Bulk UPSERT day D
+    rows = await _upsert_rows(session, records)
+
+    # Optional forward recompute, seeded from the day-D state just written
+    changed_dates = await _after_write(
+        session,
+        store_id=payload.store_id,
+        seeds={r["item_id"]: r["buckets"] for r in records},
+        start_date=payload.date + timedelta(days=1),
+        mode=mode,
+        backend=backend,
+    )
+    await _refresh_rollups(session, payload.store_id, {payload.date} | changed_dates)
+
+    await session.commit()
+    return rows
+
+
+async def bulk_upsert_inventory_range(
+    session: AsyncSession,
+    payload: InventoryRangeCreate,
+    mode: Optional[Mode] = None,  # explicit override beats payload.mode
+    backend: Optional[Backend] = None,  # defaults to PROPAGATION_BACKEND
+) -> List[Inventory]:
+    """
+    Write a store x item x date block in one pass: one seed lookup at
+    `start_date`, one SELECT for rows already inside the block, one batched
+    FIFO run, one UPSERT, then a single forward recompute from end + 1.
+    Existing rows in the block for the submitted items are recomputed too,
+    so the block stays consistent with what is not being overwritten.
+    """
+    mode = mode or getattr(payload, "mode", "propagate")
+    backend = backend or PROPAGATION_BACKEND
 
-    # One prev-day SELECT for starting buckets
-    prev_rows = await session.execute(
-        select(Inventory.item_id, Inventory.b0_end, Inventory.b1_end).where(
+    # (item_id, date) -> (db, pg); later entries win, zero cells stay silent
+    cells: Dict[Tuple[UUID, date_type], Tuple[int, int]] = {
+        (it.item_id, it.date): (it.db, it.pg)
+        for it in payload.items
+        if (it.db or it.pg)
+    }
+    if not cells:
+        return []
+
+    item_ids = list(dict.fromkeys(item_id for item_id, _ in cells))
+    shelf_life = await _shelf_lives(session, item_ids)
+    seeds = await _seed_state(session, payload.store_id, shelf_life, payload.start_date)
+
+    existing = await session.execute(
+        select(Inventory.item_id, Inventory.date, Inventory.db, Inventory.pg).where(
             and_(
                 Inventory.store_id == payload.store_id,
-                Inventory.date == prev_date,
                 Inventory.item_id.in_(item_ids),
+                Inventory.date >= payload.start_date,
+                Inventory.date <= payload.end_date,
             )
         )
     )
-    prev_map: Dict[UUID, Tuple[int, int]] = {
-        r.item_id: (r.b0_end or 0, r.b1_end or 0) for r in prev_rows
-    }
+    block = {(r.item_id, r.date): (r.db or 0, r.pg or 0) for r in existing}
+    block.update(cells)
+
+    # Dense items x calendar block; days with no row stay 0/0 (silent)
+    item_idx = {item_id: i for i, item_id in enumerate(item_ids)}
+    n_days = (payload.end_date - payload.start_date).days + 1
+    db = np.zeros((len(item_ids), n_days), dtype=np.int64)
+    pg = np.zeros_like(db)
+    for (item_id, day), (db_qty, pg_qty) in block.items():
+        d = (day - payload.start_date).days
+        db[item_idx[item_id], d] = db_qty
+        pg[item_idx[item_id], d] = pg_qty
+
+    waste, rem, buckets = _fifo_batch(
+        prev_buckets=_padded(seeds, item_ids),
+        db_qty=db,
+        pg_qty=pg,
+        shelf_life=[shelf_life[item_id] for item_id in item_ids],
+    )
+    widths = {item_id: shelf_life[item_id] - 1 for item_id in item_ids}
 
-    # Compute derived fields for day D
     records = []
-    for it in active_items:
-        p0, p1 = prev_map.get(it.item_id, (0, 0))
-        res = _fifo_step(prev_b0_end=p0, prev_b1_end=p1, db_qty=it.db, pg_qty=it.pg)
+    for (item_id, day), (db_qty, pg_qty) in sorted(block.items()):
+        i, d = item_idx[item_id], (day - payload.start_date).days
         records.append(
             {
                 "store_id": payload.store_id,
-                "item_id": it.item_id,
-                "date": payload.date,
-                "db": it.db,
-                "pg": it.pg,
-                "waste": res["waste"],
-                "rem": res["rem"],
-                "b0_end": res["b0_end"],
-                "b1_end": res["b1_end"],
+                "item_id": item_id,
+                "date": day,
+                "db": db_qty,
+                "pg": pg_qty,
+                "waste": int(waste[i, d]),
+                "rem": int(rem[i, d]),
+                "buckets": [int(x) for x in buckets[i, d, : widths[item_id]]],
             }
         )
 
-    # Bulk UPSERT day D
-    base = pg_insert(Inventory).values(records)
-    stmt = base.on_conflict_do_update(
-        index_elements=[Inventory.store_id, Inventory.item_id, Inventory.date],
-        set_={
-            "db": base.excluded.db,
-            "pg": base.excluded.pg,
-            "waste": base.excluded.waste,
-            "rem": base.excluded.rem,
-            "b0_end": base.excluded.b0_end,
-            "b1_end": base.excluded.b1_end,
-        },
-    ).returning(Inventory)
-
-    result = await session.execute(stmt)
-    rows: List[Inventory] = list(result.scalars())
+    rows = await _upsert_rows(session, records)
 
-    # Optional forward recompute
-    if mode == "propagate":
-        start_next = payload.date + timedelta(days=1)
-        for it in active_items:
-            await _recompute_from(
-                session,
-                store_id=payload.store_id,
-                item_id=it.item_id,
-                start_date=start_next,
-            )
+    # One forward recompute, seeded from the state at the end of the block
+    changed_dates = await _after_write(
+        session,
+        store_id=payload.store_id,
+        seeds={
+            item_id: [int(x) for x in buckets[i, -1, : widths[item_id]]]
+            for item_id, i in item_idx.items()
+        },
+        start_date=payload.end_date + timedelta(days=1),
+        mode=mode,
+        backend=backend,
+    )
+    await _refresh_rollups(
+        session, payload.store_id, {r["date"] for r in records} | changed_dates
+    )
 
     await session.commit()
     return rows
+
+
+# --------------------------------------------------------------------
+# Reads
+# --------------------------------------------------------------------
+Cursor = Tuple[date_type, UUID]
+
+
+def encode_cursor(day: date_type, item_id: UUID) -> str:
+    return f"{day.isoformat()}_{item_id}"
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Inverse of `encode_cursor`; raises ValueError on malformed input."""
+    day, _, item_id = cursor.partition("_")
+    return date_type.fromisoformat(day), UUID(item_id)
+
+
+def _history_query(
+    store_id: UUID,
+    item_ids: Optional[Sequence[UUID]],
+    start_date: Optional[date_type],
+    end_date: Optional[date_type],
+    after: Optional[Cursor] = None,
+):
+    """Rows for one store ordered by (date, item_id), keyset-filtered."""
+    conds = [Inventory.store_id == store_id]
+    if item_ids:
+        conds.append(Inventory.item_id.in_(item_ids))
+    if start_date:
+        conds.append(Inventory.date >= start_date)
+    if end_date:
+        conds.append(Inventory.date <= end_date)
+    if after:
+        conds.append(tuple_(Inventory.date, Inventory.item_id) > tuple_(*after))
+    return (
+        select(
+            Inventory.id,
+            Inventory.store_id,
+            Inventory.item_id,
+            Inventory.date,
+            Inventory.db,
+            Inventory.pg,
+            Inventory.waste,
+            Inventory.rem,
+            Inventory.buckets,
+        )
+        .where(and_(*conds))
+        .order_by(Inventory.date, Inventory.item_id)
+    )
+
+
+async def list_inventory_page(
+    session: AsyncSession,
+    store_id: UUID,
+    item_ids: Optional[Sequence[UUID]] = None,
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+    after: Optional[Cursor] = None,
+    limit: int = 200,
+) -> Tuple[list, Optional[str]]:
+    """
+    One page of history plus the cursor for the next one (None when done).
+    Keyset pagination on (date, item_id) served by ix_inventory_store_date_item,
+    so page N costs the same as page 1.
+    """
+    q = _history_query(store_id, item_ids, start_date, end_date, after)
+    rows = (await session.execute(q.limit(limit + 1))).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].date, rows[-1].item_id)
+
+
+async def stream_inventory(
+    session: AsyncSession,
+    store_id: UUID,
+    item_ids: Optional[Sequence[UUID]] = None,
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+    chunk_size: int = 1000,
+) -> AsyncIterator[list]:
+    """
+    Yield history in chunks of `chunk_size` rows from a server-side cursor,
+    so memory stays bounded however long the range is.
+    """
+    q = _history_query(store_id, item_ids, start_date, end_date)
+    result = await session.stream(q.execution_options(yield_per=chunk_size))
+    async for chunk in result.partitions(chunk_size):
+        yield chunk
+
+
+async def list_rollups(
+    session: AsyncSession,
+    store_id: UUID,
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+) -> List[InventoryRollup]:
+    """Daily per-category totals for one store, oldest first."""
+    conds = [InventoryRollup.store_id == store_id]
+    if start_date:
+        conds.append(InventoryRollup.date >= start_date)
+    if end_date:
+        conds.append(InventoryRollup.date <= end_date)
+    result = await session.execute(
+        select(InventoryRollup)
+        .where(and_(*conds))
+        .order_by(InventoryRollup.date, InventoryRollup.category)
+    )
+    return list(result.scalars())
@@ -1,13 +1,14 @@
 import logging
 import os
 from functools import lru_cache
-from typing import Any, AsyncGenerator, Dict
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple
+from uuid import uuid4
 
 from dotenv import load_dotenv
 from sqlalchemy.engine import url as sa_url
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
 load_dotenv()
 
@@ -25,8 +26,94 @@ logger.setLevel(LOG_LEVEL)
 Base = declarative_base()
 
 
+def _env_flag(name: str, default: str = "") -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes")
+
+
+# Defer the engine, password hashing and rarely used routers to first use.
+# On by default on Vercel, where every cold start pays for the imports.
+LAZY_INIT = _env_flag("LAZY_INIT", "1" if os.getenv("VERCEL") else "")
+
+# ---------------------- Pooling ----------------------
+# null      -> new connection per checkout; serverless (Vercel), the default
+# queue     -> sized pool kept across requests; long-running uvicorn
+# pgbouncer -> sized pool in front of PgBouncer in transaction mode, so no
+#              server-side prepared statement may outlive a transaction
+#              (see DB_PGBOUNCER)
+POOL_MODES = ("null", "queue", "pgbouncer")
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "null").strip().lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds
+# ----------------------------------------------------
+
+# ---------------------- Statement caches ----------------------
+# compiled SQL strings per engine (SQLAlchemy's query_cache_size)
+DB_COMPILED_CACHE_SIZE = int(os.getenv("DB_COMPILED_CACHE_SIZE", "500"))
+# server-side prepared statements per connection (asyncpg); only pays off
+# when connections are reused, i.e. not with DB_POOL_MODE=null
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+# Set when DATABASE_URL goes through PgBouncer in transaction mode (e.g. a
+# "-pooler" host) under any pool mode; DB_POOL_MODE=pgbouncer implies it.
+DB_PGBOUNCER = _env_flag("DB_PGBOUNCER")
+# --------------------------------------------------------------
+
+
+def _pool_options(mode: str) -> Tuple[Dict[str, Any], str]:
+    """(create_async_engine kwargs, banner text)"""
+    if mode == "null":
+        # a connection that was just opened needs no liveness ping
+        return {"poolclass": NullPool, "pool_pre_ping": False}, "NullPool"
+
+    kwargs: Dict[str, Any] = {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        # idle pooled connections can be cut by the server or a proxy
+        "pool_pre_ping": True,
+    }
+    banner = (
+        f"QueuePool(size={DB_POOL_SIZE}, overflow={DB_MAX_OVERFLOW}, "
+        f"recycle={DB_POOL_RECYCLE}s)"
+    )
+    return kwargs, banner
+
+
+def _statement_cache_options(
+    pgbouncer: bool,
+) -> Tuple[Dict[str, Any], Dict[str, str], str]:
+    """(extra asyncpg connect_args, extra URL query, banner text)"""
+    if pgbouncer:
+        # PgBouncer transaction mode hands each transaction to any server
+        # connection: nothing prepared may be cached, and what is prepared
+        # needs a name that cannot collide with another client's.
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+        query = {"prepared_statement_cache_size": "0"}
+        return connect_args, query, "stmt_cache=off(pgbouncer)"
+
+    # asyncpg's own cache serves raw driver connections (COPY, ingest);
+    # the dialect keeps a second one for statements run through SQLAlchemy
+    connect_args = {"statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    query = {"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)}
+    return connect_args, query, f"stmt_cache={DB_STATEMENT_CACHE_SIZE}"
+
+
 @lru_cache
-def get_async_engine() -> AsyncEngine:
+def get_async_engine(pool_mode: Optional[str] = None) -> AsyncEngine:
+    """
+    Engine for DATABASE_URL. ``pool_mode`` is one of POOL_MODES and
+    defaults to DB_POOL_MODE; one engine is built per mode.
+    """
+    mode = (pool_mode or DB_POOL_MODE).lower()
+    if mode not in POOL_MODES:
+        raise RuntimeError(f"DB_POOL_MODE must be one of {POOL_MODES}, got {mode!r}")
+
     # Source env remains DATABASE_URL to avoid changing behavior
     src = "DATABASE_URL"
     raw = (os.getenv(src) or "").strip().strip("'").strip('"')
@@ -55,13 +142,21 @@ def get_async_engine() -> AsyncEngine:
     # Remove params asyncpg does not understand
     q.pop("channel_binding", None)
 
+    pool_kwargs, pool_banner = _pool_options(mode)
+    cache_connect_args, cache_query, cache_banner = _statement_cache_options(
+        DB_PGBOUNCER or mode == "pgbouncer"
+    )
+    connect_args.update(cache_connect_args)
+    q.update(cache_query)
+
     u = u.set(query=q)
 
     # One-time cold-start banner to Vercel logs
     banner = (
         f"async engine configured src={src} driver={u.drivername} "
         f"user={u.username} host={u.host} db={u.database} "
-        f"ssl={bool(connect_args.get('ssl'))} pool=NullPool"
+        f"ssl={bool(connect_args.get('ssl'))} pool={mode}:{pool_banner} "
+        f"{cache_banner} compiled_cache={DB_COMPILED_CACHE_SIZE}"
     )
     logger.info(banner)
     print(f"[DB] {banner}")  # always shows in Function Logs
@@ -69,21 +164,18 @@ def get_async_engine() -> AsyncEngine:
     return create_async_engine(
         u,
         connect_args=connect_args,
-        pool_pre_ping=True,
-        poolclass=NullPool,  # serverless-friendly
+        query_cache_size=DB_COMPILED_CACHE_SIZE,
         future=True,
+        **pool_kwargs,
     )
 
 
-async_engine = get_async_engine()
-
-
 def engine_public_info() -> Dict[str, Any]:
     """
     Safe snapshot of current engine URL pieces for debug endpoints.
     No secrets are returned.
     """
-    u = async_engine.url
+    u = get_async_engine().url
     return {
         "driver": u.drivername,
         "user": u.username,
@@ -96,11 +188,27 @@ def engine_public_info() -> Dict[str, Any]:
 # --------------------------------------------------------------------
 # 2)  Session factory
 # --------------------------------------------------------------------
-async_session_maker = sessionmaker(
-    async_engine,
-    expire_on_commit=False,
-    class_=AsyncSession,
-)
+@lru_cache
+def get_session_maker() -> sessionmaker:
+    return sessionmaker(
+        get_async_engine(),
+        expire_on_commit=False,
+        class_=AsyncSession,
+    )
+
+
+def __getattr__(name: str) -> Any:
+    # `async_engine` / `async_session_maker` are built on first access, so
+    # importing this module (every model does) never connects or logs
+    if name == "async_engine":
+        return get_async_engine()
+    if name == "async_session_maker":
+        return get_session_maker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if not LAZY_INIT:
+    get_async_engine()  # fail fast on a bad DATABASE_URL, banner at boot
 
 
 # --------------------------------------------------------------------
@@ -114,7 +222,7 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         from backend.app.utils.db import get_session
     """
     logger.debug("session open")
-    async with async_session_maker() as session:
+    async with get_session_maker()() as session:
         try:
             yield session
             await session.commit()
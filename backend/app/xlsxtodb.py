@@ -16,71 +16,180 @@ PGPORT  (defaults: reader/secret/localhost/sales/5432)
 
 Notes
 -----
-• Will create table *fact_daily_sales* with
-reasonable dtypes if it does not exist.
-• Uses pandas.to_sql with *method="multi"* for batched INSERTs.
-• Duplicate prevention is left to the SQL layer
-(unique constraint on (sales_date, store_name, item_name)).
+• Expects the partitioned *sales* table from ``alembic upgrade head``;
+months without a partition get one after each load.
+• Reads the sheet in row chunks (read-only openpyxl) and cleans each chunk
+on its own, so memory stays bounded by ``--chunk-rows``. The cleaned rows
+are cached as Parquet (see cache_path) and memory-mapped on later runs
+when pyarrow is installed.
+• Streams the chunks with Postgres ``COPY ... FORMAT csv`` over the
+asyncpg connection into a temporary staging table and merges it on
+(sales_date, store_name, item_name); ``--append`` copies straight into
+sales and ``--truncate`` clears it first.
+• For many workbooks, or to skip files and days already loaded, use
+``python -m backend.app.ingest`` (file/day content-hash manifest).
+• ``--method multi`` keeps the old pandas.to_sql batched-INSERT path
+around for comparison (see backend/benchmarks/sales_load.py).
 """
 
 from __future__ import annotations
 
+import argparse
 import asyncio
+import hashlib
+import inspect as pyinspect
+import os
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Union
 
 import pandas as pd
-from sqlalchemy import BIGINT, DATE, NUMERIC, VARCHAR, Column, MetaData, Table, inspect
+from openpyxl import load_workbook
+from sqlalchemy import (
+    BIGINT,
+    DATE,
+    NUMERIC,
+    VARCHAR,
+    Column,
+    Index,
+    MetaData,
+    Table,
+    inspect,
+)
 from sqlalchemy.ext.asyncio import AsyncEngine
 
 from backend.app.utils.db import get_async_engine
 
+try:  # optional: without pyarrow the Parquet cache is simply skipped
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
 
+DROP_COLUMNS = [
+    "STORE_CODE",
+    "SUBFAMILY_CODE",
+    "SUBFAMILY_NAME",
+    "ITEM_CODE",
+    "VENDOR_CODE",
+    "VENDOR_NAME",
+    "CONSIGNMENT_FLAG",
+]
+
+# Standard column order / names for DB
+COLUMN_NAMES = {
+    "SALES_DATE": "sales_date",
+    "STORE_NAME": "store_name",
+    "ITEM_NAME": "item_name",
+    "SALES_QTY": "sales_qty",
+    "SALES_AMOUNT_INC_VAT": "sales_amount_inc_vat",
+    "VAT_AMOUNT": "vat_amount",
+    "NET_SALES": "net_sales",
+    "TOTAL_COST": "total_cost",
+    "MARGIN": "margin",
+    "MARGIN_PERCENT": "margin_percent",
+}
+
+NAME_COLUMNS = ["store_name", "item_name"]
+
+# NUMERIC(14, 2) columns, held in the cleaned frame as integer hundredths
+MONEY_COLUMNS = [
+    "sales_amount_inc_vat",
+    "vat_amount",
+    "net_sales",
+    "total_cost",
+    "margin",
+    "margin_percent",
+]
+
+
+def _clean_names(col: pd.Series, prefix: str) -> pd.Series:
+    # strip each distinct spelling once rather than once per row; a few
+    # spellings may collapse onto the same label, hence the re-encode
+    cat = col.astype("category")
+    labels = cat.cat.categories.str.removeprefix(prefix).str.strip()
+    values = labels.take(cat.cat.codes, allow_fill=True, fill_value=None)
+    return pd.Series(values, index=col.index, dtype="category")
+
+
+def _to_cents(col: pd.Series) -> pd.Series:
+    return (pd.to_numeric(col, errors="coerce") * 100).round().astype("Int64")
+
+
 def clean_dataframe(raw: pd.DataFrame) -> pd.DataFrame:
-    df = raw.copy()
-
-    # Drop unused columns
-    df.drop(
-        columns=[
-            "STORE_CODE",
-            "SUBFAMILY_CODE",
-            "SUBFAMILY_NAME",
-            "ITEM_CODE",
-            "VENDOR_CODE",
-            "VENDOR_NAME",
-            "CONSIGNMENT_FLAG",
-        ],
-        inplace=True,
-        errors="ignore",
-    )
+    """
+    Normalise an export sheet into the sales column layout.
+
+    Store and item names come back categorical, with categories that differ
+    from chunk to chunk (the Parquet cache pins their type, see
+    _cache_schema), sales_qty as Int32, sales_date as datetime64 and the
+    money columns as nullable integer hundredths (see to_db_values).
+    ``raw`` is not modified and not copied: under pandas 3's copy-on-write
+    (pinned in requirements.txt) the untouched columns share its buffers.
+    """
+    df = raw.drop(columns=DROP_COLUMNS, errors="ignore").rename(columns=COLUMN_NAMES)
 
     # Normalise data types and contents
-    df["SALES_DATE"] = pd.to_datetime(df["SALES_DATE"], errors="coerce").dt.date
-    df["ITEM_NAME"] = df["ITEM_NAME"].str.removeprefix("'HAPPIPPANG").str.strip()
-    df["STORE_NAME"] = df["STORE_NAME"].str.removeprefix("'").str.strip()
-
-    # Standard column order / names for DB
-    df.rename(
-        columns={
-            "SALES_DATE": "sales_date",
-            "STORE_NAME": "store_name",
-            "ITEM_NAME": "item_name",
-            "SALES_QTY": "sales_qty",
-            "SALES_AMOUNT_INC_VAT": "sales_amount_inc_vat",
-            "VAT_AMOUNT": "vat_amount",
-            "NET_SALES": "net_sales",
-            "TOTAL_COST": "total_cost",
-            "MARGIN": "margin",
-            "MARGIN_PERCENT": "margin_percent",
-        },
-        inplace=True,
-    )
+    df["sales_date"] = pd.to_datetime(df["sales_date"], errors="coerce").dt.normalize()
+    df["item_name"] = _clean_names(df["item_name"], "'HAPPIPPANG")
+    df["store_name"] = _clean_names(df["store_name"], "'")
+    if "sales_qty" in df:
+        df["sales_qty"] = pd.to_numeric(df["sales_qty"], errors="coerce").astype(
+            "Int32"
+        )
+    for c in MONEY_COLUMNS:
+        if c in df:
+            df[c] = _to_cents(df[c])
+
+    return df
+
 
+def to_db_values(df: pd.DataFrame) -> pd.DataFrame:
+    """Money columns back from hundredths to NUMERIC(14, 2) values."""
+    return df.assign(**{c: df[c] / 100 for c in MONEY_COLUMNS if c in df})
+
+
+def concat_cleaned(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """pd.concat for cleaned chunks, keeping the name columns categorical."""
+    df = pd.concat(frames, ignore_index=True)
+    for c in NAME_COLUMNS:
+        df[c] = df[c].astype("category")
     return df
 
 
+def _cache_schema(columns: Iterable[str]) -> "pa.Schema":
+    """
+    Parquet schema of the cleaned-rows cache, fixed up front so it never
+    depends on which rows arrive first: name columns keep int32 dictionary
+    indices however many distinct names a later chunk brings. Columns
+    outside the sales layout are stored as strings.
+    """
+    names = pa.dictionary(pa.int32(), pa.string())
+    types = {
+        "sales_date": pa.timestamp("us"),
+        "store_name": names,
+        "item_name": names,
+        "sales_qty": pa.int32(),
+        **{c: pa.int64() for c in MONEY_COLUMNS},
+    }
+    return pa.schema([pa.field(c, types.get(c, pa.string())) for c in columns])
+
+
+# Part of every cache key: editing the cleaning rules (or the cache layout)
+# invalidates the cache.
+CLEANING_VERSION = hashlib.sha256(
+    repr((DROP_COLUMNS, COLUMN_NAMES, MONEY_COLUMNS)).encode()
+    + pyinspect.getsource(_clean_names).encode()
+    + pyinspect.getsource(_to_cents).encode()
+    + pyinspect.getsource(clean_dataframe).encode()
+    + pyinspect.getsource(_cache_schema).encode()
+).hexdigest()[:12]
+
+
 meta = MetaData()
 
 sales_table = Table(
@@ -96,40 +205,294 @@ sales_table = Table(
     Column("total_cost", NUMERIC(14, 2), nullable=False),
     Column("margin", NUMERIC(14, 2), nullable=False),
     Column("margin_percent", NUMERIC(14, 2), nullable=False),
-    # UniqueConstraint("sales_date", "store_name", "item_name", name="uix_sales"),
+    Index("uix_sales", "sales_date", "store_name", "item_name", unique=True),
+    Index("ix_sales_date_brin", "sales_date", postgresql_using="brin"),
+    Index("ix_sales_series", "store_name", "item_name", "sales_date"),
+)
+
+# The real sales table is created by Alembic (fba86029a07e) as a monthly
+# range-partitioned table; this definition supplies the column layout and
+# lets ensure_table build unpartitioned scratch copies. Rows for a month
+# without a partition land in sales_default until this splits them out.
+SPLIT_DEFAULT_PARTITION = (
+    "SELECT sales_create_partitions(min(sales_date), max(sales_date)) "
+    "FROM sales_default"
 )
 
+SALES_KEY = ("sales_date", "store_name", "item_name")
+
+# Rows per chunk, both when reading a workbook and when encoding for COPY;
+# bounds what is held in memory at once.
+COPY_CHUNK_ROWS = 50_000
+
+
+def iter_workbook_chunks(
+    path: Union[str, Path], chunk_rows: int = COPY_CHUNK_ROWS
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the first sheet of ``path`` as cleaned frames of ``chunk_rows`` rows.
+
+    openpyxl's read-only mode streams rows from the sheet XML, so peak memory
+    depends on ``chunk_rows`` rather than on the size of the workbook.
+    """
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        buf: List[tuple] = []
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            buf.append(row)
+            if len(buf) >= chunk_rows:
+                yield clean_dataframe(pd.DataFrame(buf, columns=header))
+                buf = []
+        if buf:
+            yield clean_dataframe(pd.DataFrame(buf, columns=header))
+    finally:
+        wb.close()
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(
+    path: Union[str, Path], file_hash: str, cache_dir: Union[str, Path, None] = None
+) -> Path:
+    """
+    Parquet file holding the cleaned rows of ``path``.
+
+    Lives in $SALES_CACHE_DIR, or a ``.cleaned`` directory next to the
+    workbook, and is keyed by workbook content and CLEANING_VERSION, so a
+    changed export or changed cleaning rules simply miss.
+    """
+    root = cache_dir or os.getenv("SALES_CACHE_DIR") or Path(path).parent / ".cleaned"
+    return Path(root) / f"{file_hash}-{CLEANING_VERSION}.parquet"
+
+
+def iter_cleaned_chunks(
+    path: Union[str, Path],
+    chunk_rows: int = COPY_CHUNK_ROWS,
+    *,
+    file_hash: Optional[str] = None,
+    cache_dir: Union[str, Path, None] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    iter_workbook_chunks, served from the Parquet cache when it is warm.
+
+    A hit memory-maps the cached file and yields record batches; a miss
+    parses the workbook and writes each chunk to the cache as it goes. The
+    cache file only appears once the whole workbook has been read. Without
+    pyarrow every call parses the workbook.
+    """
+    if pq is None:
+        yield from iter_workbook_chunks(path, chunk_rows)
+        return
+
+    cached = cache_path(path, file_hash or file_sha256(path), cache_dir)
+    if cached.exists():
+        parquet = pq.ParquetFile(cached, memory_map=True)
+        for batch in parquet.iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    writer: Optional[pq.ParquetWriter] = None
+    schema: Optional[pa.Schema] = None
+    try:
+        for chunk in iter_workbook_chunks(path, chunk_rows):
+            if schema is None:
+                schema = _cache_schema(chunk.columns)
+            extra = {f.name: "string" for f in schema if f.type == pa.string()}
+            table = pa.Table.from_pandas(
+                chunk.astype(extra), schema=schema, preserve_index=False
+            )
+            if writer is None:
+                # the types are schema's; this adds the pandas dtype metadata
+                writer = pq.ParquetWriter(tmp, table.schema)
+            writer.write_table(table)
+            yield chunk
+        if writer is not None:
+            writer.close()
+            os.replace(tmp, cached)
+    finally:
+        if writer is not None and writer.is_open:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+
+
+def read_cleaned(
+    path: Union[str, Path], cache_dir: Union[str, Path, None] = None
+) -> pd.DataFrame:
+    """The whole cleaned workbook, through the Parquet cache."""
+    cached = cache_path(path, file_sha256(path), cache_dir)
+    if pq is not None and cached.exists():
+        return pq.read_table(cached, memory_map=True).to_pandas()
+    return concat_cleaned(iter_cleaned_chunks(path, cache_dir=cache_dir))
+
+
 ###############################################################################
 # Core I/O functions
 ###############################################################################
 
 
-async def ensure_table(engine: AsyncEngine) -> None:
-    """Create fact_daily_sales if it doesn't exist."""
+async def ensure_table(engine: AsyncEngine, table: Table) -> None:
+    """Create an unpartitioned copy of the sales layout if it doesn't exist."""
     async with engine.begin() as conn:
-        await conn.run_sync(meta.create_all)
+        await conn.run_sync(table.metadata.create_all, tables=[table])
+        for index in table.indexes:
+            await conn.run_sync(index.create, checkfirst=True)
+
 
+def _frame_chunks(df: pd.DataFrame, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start : start + chunk_rows]
 
-async def bulk_upsert(df: pd.DataFrame, engine: AsyncEngine, truncate: bool) -> None:
-    # swap +asyncpg → +psycopg2 for a blocking engine
-    sync_engine = get_async_engine()
 
-    def _upload() -> None:
-        with sync_engine.begin() as conn:
+async def _csv_chunks(
+    frames: Iterable[pd.DataFrame], columns: List[str], copied: List[int]
+) -> AsyncIterator[bytes]:
+    # frames may be parsing a workbook; pull each one off the event loop
+    it = iter(frames)
+    while (chunk := await asyncio.to_thread(next, it, None)) is not None:
+        copied[0] += len(chunk)
+        csv = to_db_values(chunk).to_csv(
+            columns=columns, header=False, index=False, float_format="%.2f"
+        )
+        yield csv.encode()
+
+
+def _merge_sql(table: Table, stage: str) -> str:
+    cols = [c.name for c in table.columns]
+    key = ", ".join(SALES_KEY)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in cols if c not in SALES_KEY)
+    # ctid DESC: when a key repeats inside one load, the last row copied wins
+    return (
+        f"INSERT INTO {table.name} ({', '.join(cols)}) "
+        f"SELECT DISTINCT ON ({key}) {', '.join(cols)} FROM {stage} "
+        f"ORDER BY {key}, ctid DESC "
+        f"ON CONFLICT ({key}) DO UPDATE SET {updates}"
+    )
+
+
+async def copy_into(
+    pg,
+    frames: Iterable[pd.DataFrame],
+    *,
+    upsert: bool = False,
+    table: Table = sales_table,
+) -> int:
+    """
+    COPY cleaned ``frames`` into ``table`` on an asyncpg connection ``pg``,
+    inside whatever transaction the caller holds.
+
+    With ``upsert`` the rows land in a temporary staging table first and are
+    merged on the natural key, so re-loading an export updates in place.
+    Returns the number of rows copied.
+    """
+    cols = [c.name for c in table.columns]
+    copied = [0]
+
+    target = table.name
+    if upsert:
+        target = f"{table.name}_stage"
+        await pg.execute(
+            f"CREATE TEMP TABLE {target} "
+            f"(LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+
+    await pg.copy_to_table(
+        target,
+        source=_csv_chunks(frames, cols, copied),
+        columns=cols,
+        format="csv",
+    )
+
+    if upsert:
+        await pg.execute(_merge_sql(table, target))
+        await pg.execute(f"DROP TABLE {target}")
+    return copied[0]
+
+
+async def copy_chunks(
+    frames: Iterable[pd.DataFrame],
+    engine: AsyncEngine,
+    *,
+    truncate: bool = False,
+    upsert: bool = False,
+    table: Table = sales_table,
+) -> int:
+    """Stream cleaned ``frames`` into ``table`` in a single transaction."""
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        pg = raw.driver_connection  # asyncpg.Connection
+        async with pg.transaction():
             if truncate:
-                conn.execute(sales_table.delete())
-            df.to_sql(
-                name=sales_table.name,
-                con=conn,
-                index=False,
-                if_exists="append",
-                method="multi",
-                chunksize=1000,
-            )
+                await pg.execute(f"TRUNCATE {table.name}")
+            copied = await copy_into(pg, frames, upsert=upsert, table=table)
+            if table is sales_table:
+                await pg.execute(SPLIT_DEFAULT_PARTITION)
+            return copied
+
+
+async def copy_frame(
+    df: pd.DataFrame,
+    engine: AsyncEngine,
+    *,
+    truncate: bool = False,
+    upsert: bool = False,
+    table: Table = sales_table,
+    chunk_rows: int = COPY_CHUNK_ROWS,
+) -> int:
+    """copy_chunks over an in-memory frame."""
+    return await copy_chunks(
+        _frame_chunks(df, chunk_rows),
+        engine,
+        truncate=truncate,
+        upsert=upsert,
+        table=table,
+    )
 
-    # run the blocking upload in a worker thread
-    await asyncio.to_thread(_upload)
-    await asyncio.to_thread(sync_engine.dispose)
+
+async def insert_frame_multi(
+    df: pd.DataFrame,
+    engine: AsyncEngine,
+    truncate: bool,
+    table: Table = sales_table,
+) -> int:
+    """The original pandas.to_sql(method="multi") path, kept for comparison."""
+
+    def _upload(sync_conn) -> None:
+        if truncate:
+            sync_conn.execute(table.delete())
+        to_db_values(df).to_sql(
+            name=table.name,
+            con=sync_conn,
+            index=False,
+            if_exists="append",
+            method="multi",
+            chunksize=1000,
+        )
+        if table is sales_table:
+            sync_conn.exec_driver_sql(SPLIT_DEFAULT_PARTITION)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(_upload)
+    return len(df)
+
+
+async def bulk_upsert(
+    df: pd.DataFrame, engine: AsyncEngine, truncate: bool = False, upsert: bool = True
+) -> int:
+    return await copy_frame(df, engine, truncate=truncate, upsert=upsert)
 
 
 async def reflect():
@@ -147,22 +510,34 @@ async def reflect():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--xlsx", default="../../data/hero.xlsx")
+    parser.add_argument("--truncate", action="store_true")
+    parser.add_argument("--append", dest="upsert", action="store_false")
+    parser.add_argument("--method", choices=("copy", "multi"), default="copy")
+    parser.add_argument("--chunk-rows", type=int, default=COPY_CHUNK_ROWS)
+    args = parser.parse_args()
+
     engine = get_async_engine()
 
     async def main():
         try:
-            # 1. Ensure table exists
+            # 1. sales and its partitions come from `alembic upgrade head`
             await reflect()
-            await ensure_table(engine)
-
-            # 2. Read & clean workbook
-            raw = pd.read_excel("../../data/hero.xlsx")
-            df = clean_dataframe(raw)
-
-            # # 3. Upsert / append
-            await bulk_upsert(df, engine, truncate=True)
 
-            print(f"Loaded {len(df):,} rows into sales")
+            # 2. Read & clean workbook, 3. Upsert / append
+            if args.method == "multi":
+                df = read_cleaned(args.xlsx)
+                loaded = await insert_frame_multi(df, engine, truncate=args.truncate)
+            else:
+                loaded = await copy_chunks(
+                    iter_cleaned_chunks(args.xlsx, args.chunk_rows),
+                    engine,
+                    truncate=args.truncate,
+                    upsert=args.upsert,
+                )
+
+            print(f"Loaded {loaded:,} rows into sales")
         finally:
             await engine.dispose()
 
@@ -0,0 +1,74 @@
+"""
+Memory of the cleaned sales frame: the original object/float64 cleaning
+against the current categorical / integer-hundredths one.
+
+Reports the deep size of the cleaned frame and the peak allocation traced
+by tracemalloc while cleaning.
+
+Usage
+-----
+$ python -m backend.benchmarks.clean_memory                  # 3 synthetic years
+$ python -m backend.benchmarks.clean_memory --xlsx data/hero.xlsx
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import pandas as pd
+
+from backend.app.xlsxtodb import COLUMN_NAMES, DROP_COLUMNS, clean_dataframe
+from backend.benchmarks.sales_load import synthetic_export
+
+
+def legacy_clean(raw: pd.DataFrame) -> pd.DataFrame:
+    """clean_dataframe as it was before the lean dtypes, for comparison."""
+    df = raw.copy()
+    df.drop(columns=DROP_COLUMNS, inplace=True, errors="ignore")
+    df["SALES_DATE"] = pd.to_datetime(df["SALES_DATE"], errors="coerce").dt.date
+    df["ITEM_NAME"] = df["ITEM_NAME"].str.removeprefix("'HAPPIPPANG").str.strip()
+    df["STORE_NAME"] = df["STORE_NAME"].str.removeprefix("'").str.strip()
+    df.rename(columns=COLUMN_NAMES, inplace=True)
+    return df
+
+
+def measure(
+    clean: Callable[[pd.DataFrame], pd.DataFrame], raw: pd.DataFrame
+) -> Tuple[int, int, float]:
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    df = clean(raw)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return int(df.memory_usage(deep=True).sum()), peak, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--xlsx")
+    parser.add_argument("--stores", type=int, default=20)
+    parser.add_argument("--items", type=int, default=60)
+    parser.add_argument("--days", type=int, default=3 * 365)
+    args = parser.parse_args()
+
+    if args.xlsx:
+        raw = pd.read_excel(args.xlsx)
+    else:
+        raw = synthetic_export(args.stores, args.items, args.days)
+
+    mb = 1 << 20
+    print(
+        f"{len(raw):,} rows, raw frame {raw.memory_usage(deep=True).sum() / mb:.1f} MiB"
+    )
+    for name, clean in (("legacy", legacy_clean), ("lean", clean_dataframe)):
+        size, peak, elapsed = measure(clean, raw)
+        print(
+            f"{name:<7} frame {size / mb:8.1f} MiB  "
+            f"peak {peak / mb:8.1f} MiB  {elapsed:6.2f}s"
+        )
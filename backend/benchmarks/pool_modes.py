@@ -0,0 +1,84 @@
+"""
+Per-request latency of each DB_POOL_MODE against DATABASE_URL.
+
+A "request" is what get_session does for a typical read: open a session,
+run one query, commit and close. Each mode gets its own engine; requests
+run back to back and then ``--concurrency`` at a time, like uvicorn under
+load. The pgbouncer profile only differs from queue when DATABASE_URL
+points at a PgBouncer.
+
+Usage
+-----
+$ python -m backend.benchmarks.pool_modes
+$ python -m backend.benchmarks.pool_modes --requests 500 --concurrency 20
+$ python -m backend.benchmarks.pool_modes --modes null queue
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.utils.db import POOL_MODES, get_async_engine
+
+QUERY = text("SELECT count(*) FROM items")
+
+
+async def one_request(session_maker) -> float:
+    t0 = time.perf_counter()
+    async with session_maker() as session:
+        await session.execute(QUERY)
+        await session.commit()
+    return time.perf_counter() - t0
+
+
+async def measure(engine: AsyncEngine, requests: int, concurrency: int) -> None:
+    session_maker = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await one_request(session_maker)  # connect once so queue modes start warm
+
+    serial: List[float] = [await one_request(session_maker) for _ in range(requests)]
+
+    gate = asyncio.Semaphore(concurrency)
+
+    async def gated() -> float:
+        async with gate:
+            return await one_request(session_maker)
+
+    t0 = time.perf_counter()
+    parallel = await asyncio.gather(*(gated() for _ in range(requests)))
+    wall = time.perf_counter() - t0
+
+    for label, samples in (("serial", serial), (f"x{concurrency}", parallel)):
+        ms = np.asarray(samples) * 1000
+        print(
+            f"  {label:<8} p50 {np.percentile(ms, 50):7.2f} ms  "
+            f"p95 {np.percentile(ms, 95):7.2f} ms  max {ms.max():7.2f} ms"
+        )
+    print(f"  {'':<8} {requests / wall:,.0f} req/s at x{concurrency}")
+
+
+async def run(modes: List[str], requests: int, concurrency: int) -> None:
+    for mode in modes:
+        print(f"{mode}:")
+        engine = get_async_engine(mode)
+        try:
+            await measure(engine, requests, concurrency)
+        finally:
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modes", nargs="*", choices=POOL_MODES, default=POOL_MODES)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(run(list(args.modes), args.requests, args.concurrency))
@@ -0,0 +1,116 @@
+"""
+Rows/sec of the sales loaders: COPY, COPY + staged upsert, and the old
+pandas.to_sql(method="multi") path.
+
+Loads into a scratch ``sales_bench`` table (created and dropped here), so it
+is safe to point at a shared database.
+
+Usage
+-----
+$ python -m backend.benchmarks.sales_load                      # synthetic year
+$ python -m backend.benchmarks.sales_load --xlsx a.xlsx b.xlsx # real exports
+$ python -m backend.benchmarks.sales_load --skip multi
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import MetaData
+
+from backend.app.utils.db import get_async_engine
+from backend.app.xlsxtodb import (
+    clean_dataframe,
+    copy_frame,
+    ensure_table,
+    insert_frame_multi,
+    sales_table,
+)
+
+
+def synthetic_export(stores: int, items: int, days: int, seed: int = 0) -> pd.DataFrame:
+    """One row per (day, store, item), shaped like a raw store export sheet."""
+    rng = np.random.default_rng(seed)
+    n = stores * items * days
+
+    qty = rng.poisson(12, n)
+    price = rng.choice([5000.0, 7000.0, 3000.0], n)
+    gross = qty * price
+    vat = np.round(gross * 0.11 / 1.11, 2)
+    net = gross - vat
+    cost = np.round(net * 0.6, 2)
+    margin = net - cost
+    return pd.DataFrame(
+        {
+            "SALES_DATE": np.repeat(
+                pd.date_range("2025-01-01", periods=days).to_numpy(), stores * items
+            ),
+            "STORE_CODE": np.tile(np.repeat(np.arange(stores), items), days),
+            "STORE_NAME": np.tile(
+                np.repeat([f"'STORE {s:03d}" for s in range(stores)], items), days
+            ),
+            "ITEM_CODE": np.tile(np.arange(items), stores * days),
+            "ITEM_NAME": np.tile(
+                [f"'HAPPIPPANG ITEM {i:04d}" for i in range(items)], stores * days
+            ),
+            "SALES_QTY": qty,
+            "SALES_AMOUNT_INC_VAT": gross,
+            "VAT_AMOUNT": vat,
+            "NET_SALES": net,
+            "TOTAL_COST": cost,
+            "MARGIN": margin,
+            "MARGIN_PERCENT": np.round(
+                np.divide(margin, net, out=np.zeros(n), where=net != 0) * 100, 2
+            ),
+        }
+    )
+
+
+async def run(df: pd.DataFrame, skip: set[str]) -> None:
+    engine = get_async_engine()
+    bench = sales_table.to_metadata(MetaData(), name="sales_bench")
+    for index in bench.indexes:
+        index.name = index.name.replace("sales", "sales_bench")
+
+    loaders = {
+        "copy": lambda: copy_frame(df, engine, truncate=True, table=bench),
+        "copy+upsert": lambda: copy_frame(df, engine, upsert=True, table=bench),
+        "multi": lambda: insert_frame_multi(df, engine, truncate=True, table=bench),
+    }
+    try:
+        await ensure_table(engine, bench)
+        print(f"{len(df):,} rows")
+        for name, load in loaders.items():
+            if name in skip:
+                continue
+            t0 = time.perf_counter()
+            await load()
+            elapsed = time.perf_counter() - t0
+            print(f"{name:<12} {elapsed:8.2f}s {len(df) / elapsed:12,.0f} rows/s")
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(bench.drop, checkfirst=True)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--xlsx", nargs="*", default=[])
+    parser.add_argument("--stores", type=int, default=20)
+    parser.add_argument("--items", type=int, default=60)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--skip", nargs="*", default=[])
+    args = parser.parse_args()
+
+    if args.xlsx:
+        df = pd.concat(
+            [clean_dataframe(pd.read_excel(p)) for p in args.xlsx], ignore_index=True
+        )
+    else:
+        df = clean_dataframe(synthetic_export(args.stores, args.items, args.days))
+
+    asyncio.run(run(df, set(args.skip)))
@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from backend.app.models.inventory import Inventory
+from backend.app.models.item import Item
+from backend.app.models.store import Store
+from backend.app.services.delivery import recommend_deliveries, recommend_quantities
+
+
+def plan(seeds, life, yhat, sigma=0.0, cost=1.0, **kwargs):
+    yhat = np.asarray(yhat, dtype=float)
+    return recommend_quantities(
+        np.asarray(seeds),
+        np.asarray(life),
+        yhat,
+        np.full_like(yhat, sigma),
+        np.full(len(life), cost),
+        **kwargs,
+    )
+
+
+def test_certain_demand_is_met_exactly():
+    out = plan([[2, 0], [0, 0]], [3, 3], [[10, 0, 0], [7, 7, 7]], max_stockout=0.0)
+    assert out["on_hand"].tolist() == [2, 0]
+    assert out["recommended_db"].tolist() == [8, 7]
+    assert out["stockout_probability"].tolist() == [0.0, 0.0]
+    assert out["expected_waste"].tolist() == [0.0, 0.0]
+
+
+def test_expiring_stock_is_counted_as_waste():
+    # 4 units on their last day, 3 sold: nothing to order, one unit expires
+    out = plan([[4]], [2], [[3, 3]], max_stockout=0.0)
+    assert out["recommended_db"].tolist() == [0]
+    assert out["expected_waste"].tolist() == [1.0]
+
+
+def test_stockout_tolerance_trades_off_waste():
+    kwargs = dict(seeds=[[0, 0]], life=[3], yhat=[[20, 0, 0]], sigma=5.0)
+    strict = plan(**kwargs, max_stockout=0.01)
+    loose = plan(**kwargs, max_stockout=0.5)
+    assert strict["stockout_probability"][0] <= 0.01
+    assert loose["stockout_probability"][0] <= 0.5
+    assert loose["recommended_db"][0] < strict["recommended_db"][0]
+    assert loose["expected_waste"][0] <= strict["expected_waste"][0]
+
+
+def test_largest_candidate_when_nothing_is_safe_enough():
+    out = plan([[0, 0]], [3], [[20, 0, 0]], sigma=5.0, max_stockout=-1.0)
+    assert out["stockout_probability"][0] == 0.0  # covers the worst scenario
+    anything = plan([[0, 0]], [3], [[20, 0, 0]], sigma=5.0, max_stockout=1.0)
+    assert anything["recommended_db"][0] == 0  # least waste wins
+
+
+@pytest.mark.anyio
+async def test_recommend_deliveries_from_history(session):
+    store = Store(name="delivery", type="test")
+    bread = Item(name="bread", category="bakery", cost=5, shelf_life_days=2)
+    session.add_all([store, bread])
+    await session.flush()
+    day = date(2024, 6, 1)
+    session.add_all(
+        Inventory(
+            store_id=store.id,
+            item_id=bread.id,
+            date=day - timedelta(days=d),
+            db=10,
+            pg=10,
+            waste=0,
+            rem=0,
+            buckets=[0],
+        )
+        for d in range(1, 29)
+    )
+    await session.flush()
+
+    [rec] = await recommend_deliveries(session, store.id, day)
+    assert rec["item_id"] == bread.id and rec["shelf_life_days"] == 2
+    assert rec["on_hand"] == 0
+    assert rec["forecast_demand"] == pytest.approx(10, abs=0.5)
+    assert 9 <= rec["recommended_db"] <= 12
+    assert rec["stockout_probability"] <= 0.05
+    assert await recommend_deliveries(session, store.id, day - timedelta(days=90)) == []
@@ -0,0 +1,96 @@
+"""`_fifo_batch` must agree with the scalar `_fifo_step` it vectorizes."""
+
+import numpy as np
+
+from backend.app.services.inventory import (
+    _fifo_batch,
+    _fifo_step,
+    _normalize,
+    _roll_silent,
+)
+
+
+def walk(prev, db, pg, life, gap=None):
+    """`_fifo_step` one item at a time, rolling silent days in between."""
+    waste, rem, buckets = [], [], []
+    state = list(prev)
+    for d in range(len(db)):
+        if gap is not None:
+            state = _roll_silent(state, int(gap[d]))
+        res = _fifo_step(state, int(db[d]), int(pg[d]), life)
+        state = res["buckets"]
+        waste.append(res["waste"])
+        rem.append(res["rem"])
+        buckets.append(state)
+    return waste, rem, buckets
+
+
+def check(prev, db, pg, life, gap=None):
+    waste, rem, buckets = _fifo_batch(prev, db, pg, life, gap)
+    for i, n in enumerate(life):
+        w, r, b = walk(
+            prev[i][: n - 1], db[i], pg[i], n, None if gap is None else gap[i]
+        )
+        assert waste[i].tolist() == w
+        assert rem[i].tolist() == r
+        assert buckets[i, :, : n - 1].tolist() == b
+        assert not buckets[i, :, n - 1 :].any()  # padding stays empty
+
+
+def test_three_day_life_by_hand():
+    # 5 carried at age 2 (last sellable day), 4 at age 1; deliver 10, sell 6
+    waste, rem, buckets = _fifo_batch([[4, 5]], [[10]], [[6]], [3])
+    assert waste.tolist() == [[0]]  # the age-2 stock sold out first
+    assert buckets[0, 0].tolist() == [10, 3]
+    assert rem.tolist() == [[13]]
+
+    waste, _, _ = _fifo_batch([[4, 5]], [[0]], [[2]], [3])
+    assert waste.tolist() == [[3]]
+
+
+def test_single_day_life_wastes_leftover():
+    waste, rem, buckets = _fifo_batch(np.zeros((1, 0)), [[9, 4]], [[5, 7]], [1])
+    assert waste.tolist() == [[4, 0]]
+    assert rem.tolist() == [[0, 0]]
+    assert buckets.shape == (1, 2, 0)
+
+
+def test_matches_scalar_step_mixed_lives():
+    rng = np.random.default_rng(0)
+    life = np.array([1, 2, 3, 4, 5, 7, 7, 3])
+    width = int(life.max()) - 1
+    prev = rng.integers(0, 20, (len(life), width))
+    prev[np.arange(width)[None, :] >= (life - 1)[:, None]] = 0
+    db = rng.integers(0, 30, (len(life), 40))
+    pg = rng.integers(0, 30, (len(life), 40))
+    check(prev, db, pg, life)
+
+
+def test_matches_scalar_step_with_gaps():
+    rng = np.random.default_rng(1)
+    life = np.array([2, 3, 5, 7])
+    width = int(life.max()) - 1
+    prev = rng.integers(0, 20, (len(life), width))
+    prev[np.arange(width)[None, :] >= (life - 1)[:, None]] = 0
+    db = rng.integers(0, 30, (len(life), 30))
+    pg = rng.integers(0, 30, (len(life), 30))
+    gap = rng.choice([0, 0, 0, 1, 2, 9], (len(life), 30))
+    check(prev, db, pg, life, gap)
+
+
+def test_gap_equals_silent_days():
+    # jumping a gap must match simulating the missing days as 0/0
+    prev = [[3, 2, 1, 0, 0, 0]]
+    jumped = _fifo_batch(prev, [[5]], [[1]], [7], [[2]])
+    walked = _fifo_batch(prev, [[0, 0, 5]], [[0, 0, 1]], [7])
+    assert jumped[0][0, 0] == walked[0][0, 2]
+    assert jumped[2][0, 0].tolist() == walked[2][0, 2].tolist()
+
+
+def test_normalize_and_roll_silent():
+    assert _normalize([1, 2, 3], 3) == [1, 2]
+    assert _normalize([1], 4) == [1, 0, 0]
+    assert _normalize(None, 1) == []
+    assert _roll_silent([4, 5, 6], 1) == [0, 4, 5]
+    assert _roll_silent([4, 5, 6], 5) == [0, 0, 0]
+    assert _roll_silent([4, 5], 0) == [4, 5]
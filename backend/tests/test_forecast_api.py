@@ -0,0 +1,110 @@
+import json
+from datetime import date, timedelta
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from backend.app.models.forecast import Forecast, ForecastRun
+from backend.app.routers.forecast import (
+    IMMUTABLE,
+    REVALIDATE,
+    _matches,
+    get_forecasts,
+)
+from backend.app.services import forecast as forecast_service
+from backend.app.services.forecast import forecast_etag
+
+
+def request(if_none_match=None):
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def test_etag_is_strong_and_per_view():
+    run_id = uuid4()
+    etag = forecast_etag(run_id, "Mapo", None)
+    assert etag.startswith(f'"{run_id}-') and etag.endswith('"')
+    assert etag == forecast_etag(run_id, "Mapo", None)
+    assert etag != forecast_etag(run_id, None, "Mapo")
+    assert etag != forecast_etag(uuid4(), "Mapo", None)
+
+
+def test_if_none_match_parsing():
+    etag = forecast_etag(uuid4(), None, None)
+    assert not _matches(request(), etag)
+    assert _matches(request(etag), etag)
+    assert _matches(request(f'"other", W/{etag}'), etag)
+    assert _matches(request("*"), etag)
+    assert not _matches(request('"other"'), etag)
+
+
+@pytest.fixture
+async def run(session):
+    forecast_service._bodies.clear()
+    run = ForecastRun(
+        engine="holt-winters",
+        horizon=3,
+        history_start=date(2024, 1, 1),
+        history_end=date(2024, 3, 31),
+        series_count=2,
+    )
+    session.add(run)
+    await session.flush()
+    session.add_all(
+        Forecast(
+            run_id=run.id,
+            store_name=store,
+            item_name="Milk Bread",
+            ds=date(2024, 4, 1) + timedelta(days=d),
+            yhat=d + 1.0,
+            yhat_lower=d,
+            yhat_upper=d + 2.0,
+        )
+        for store in ("Mapo", "Jamsil")
+        for d in range(3)
+    )
+    await session.flush()
+    yield run
+    forecast_service._bodies.clear()
+
+
+@pytest.mark.anyio
+async def test_latest_run_revalidates(session, run):
+    res = await get_forecasts(request(), session=session)
+    assert res.status_code == 200
+    assert res.headers["ETag"] == forecast_etag(run.id, None, None)
+    assert res.headers["Cache-Control"] == REVALIDATE
+    assert len(json.loads(res.body)) == 6
+
+    again = await get_forecasts(request(res.headers["ETag"]), session=session)
+    assert again.status_code == 304 and not again.body
+
+
+@pytest.mark.anyio
+async def test_run_by_id_is_immutable_and_filtered(session, run):
+    res = await get_forecasts(
+        request(), run_id=run.id, store_name="Mapo", session=session
+    )
+    body = json.loads(res.body)
+    assert res.headers["Cache-Control"] == IMMUTABLE
+    assert [r["store_name"] for r in body] == ["Mapo"] * 3
+    assert [r["ds"] for r in body] == ["2024-04-01", "2024-04-02", "2024-04-03"]
+
+    # the body is cached: runs never change once written
+    await session.delete(run)
+    await session.flush()
+    cached = await get_forecasts(
+        request(), run_id=run.id, store_name="Mapo", session=session
+    )
+    assert cached.body == res.body
+
+
+@pytest.mark.anyio
+async def test_unknown_run_is_404(session, run):
+    with pytest.raises(HTTPException) as exc:
+        await get_forecasts(request(), run_id=uuid4(), session=session)
+    assert exc.value.status_code == 404
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from backend.app.forecasting import (
+    cache_plan,
+    load_cached,
+    series_fingerprint,
+    store_cached,
+)
+
+KEY = ("Mapo", "Milk Bread")
+PARAMS = {"k": 0.1, "m": 0.2, "sigma_obs": 0.3, "delta": [0.0], "beta": [0.0]}
+
+
+def series(days, start="2024-01-01", bump=None):
+    y = np.arange(days, dtype=float) % 7
+    if bump is not None:
+        y[bump] += 5
+    return pd.DataFrame({"ds": pd.date_range(start, periods=days), "y": y})
+
+
+def cached(tmp_path, grp, horizon=14):
+    forecast = pd.DataFrame(
+        {
+            "ds": pd.date_range(grp["ds"].max(), periods=horizon),
+            "yhat": 1.0,
+            "yhat_lower": 0.0,
+            "yhat_upper": 2.0,
+        }
+    )
+    store_cached(
+        tmp_path,
+        KEY,
+        fingerprint=series_fingerprint(grp),
+        last_ds=grp["ds"].max(),
+        horizon=horizon,
+        params=PARAMS,
+        forecast=forecast,
+    )
+    return load_cached(tmp_path, KEY)
+
+
+def test_fingerprint_ignores_row_order_and_respects_prefix():
+    grp = series(30)
+    assert series_fingerprint(grp) == series_fingerprint(grp.iloc[::-1])
+    until = grp["ds"].iloc[19]
+    assert series_fingerprint(grp, until=until) == series_fingerprint(grp.iloc[:20])
+
+
+def test_unchanged_series_is_reused(tmp_path):
+    grp = series(30)
+    assert cache_plan(cached(tmp_path, grp), grp, 14) == (True, None)
+
+
+def test_new_days_refit_warm(tmp_path):
+    entry = cached(tmp_path, series(30))
+    assert cache_plan(entry, series(31), 14) == (False, PARAMS)
+    # a different horizon on the same rows also only needs a warm refit
+    assert cache_plan(entry, series(30), 7) == (False, PARAMS)
+
+
+def test_changed_past_refits_cold(tmp_path):
+    entry = cached(tmp_path, series(30))
+    assert cache_plan(entry, series(31, bump=3), 14) == (False, None)
+    assert cache_plan(entry, series(29), 14) == (False, None)  # last day gone
+    assert cache_plan(None, series(30), 14) == (False, None)
@@ -0,0 +1,143 @@
+from datetime import date
+
+import pytest
+from openpyxl import Workbook
+from sqlalchemy import text
+
+from backend.app.ingest import (
+    delete_stale_days,
+    expand_sources,
+    load_manifest,
+    parse_workbook,
+    record_manifest,
+    stale_days,
+)
+from backend.app.xlsxtodb import copy_into
+
+HEADER = [
+    "SALES_DATE",
+    "STORE_CODE",
+    "STORE_NAME",
+    "ITEM_CODE",
+    "ITEM_NAME",
+    "SALES_QTY",
+    "SALES_AMOUNT_INC_VAT",
+    "VAT_AMOUNT",
+    "NET_SALES",
+    "TOTAL_COST",
+    "MARGIN",
+    "MARGIN_PERCENT",
+]
+
+
+def row(day, store, item, qty):
+    return [day, "S1", f"'{store}", "I1", f"'HAPPIPPANG {item}", qty] + [
+        qty * 1.5,
+        qty * 0.1,
+        qty * 1.4,
+        qty * 0.9,
+        qty * 0.5,
+        35.71,
+    ]
+
+
+def write_workbook(path, rows):
+    wb = Workbook()
+    wb.active.append(HEADER)
+    for r in rows:
+        wb.active.append(r)
+    wb.save(path)
+    return str(path)
+
+
+EXPORT = [
+    row("2024-06-01", "Mapo", "Milk Bread", 4),
+    row("2024-06-01", "Mapo", "Cream Bun", 2),
+    row("2024-06-02", "Mapo", "Milk Bread", 6),
+    row("2024-06-02", "Jamsil", "Milk Bread", 1),
+    row("2024-06-03", "Mapo", "Milk Bread", 3),
+]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("SALES_CACHE_DIR", str(tmp_path / "cache"))
+
+
+def test_expand_sources(tmp_path):
+    for name in ("b.xlsx", "a.xlsx", "~$a.xlsx", "notes.txt"):
+        (tmp_path / name).touch()
+    found = expand_sources([str(tmp_path), str(tmp_path / "*.xlsx")])
+    assert [p.name for p in found] == ["a.xlsx", "b.xlsx"]
+
+
+def test_day_hashes_ignore_row_order(tmp_path):
+    a = parse_workbook(write_workbook(tmp_path / "a.xlsx", EXPORT), 2)
+    b = parse_workbook(write_workbook(tmp_path / "b.xlsx", EXPORT[::-1]), 2)
+    assert a.day_hashes == b.day_hashes
+    assert a.day_stores[date(2024, 6, 2)] == ["Jamsil", "Mapo"]
+    assert a.rows == 5 and a.changed_days == 3
+    assert sum(len(f) for f in a.frames) == 5
+
+
+def test_unchanged_file_is_skipped(tmp_path):
+    path = write_workbook(tmp_path / "a.xlsx", EXPORT)
+    first = parse_workbook(path, 100)
+    again = parse_workbook(path, 100, (first.file_hash, first.day_hashes))
+    assert again.day_hashes is None and not again.frames
+
+
+def test_only_changed_days_are_kept(tmp_path):
+    path = tmp_path / "a.xlsx"
+    first = parse_workbook(write_workbook(path, EXPORT), 100)
+    known = (first.file_hash, first.day_hashes)
+
+    # day 1 loses a row, day 3 is dropped from the export, day 4 is new
+    reexport = EXPORT[:1] + EXPORT[2:4] + [row("2024-06-04", "Mapo", "Milk Bread", 2)]
+    parsed = parse_workbook(write_workbook(path, reexport), 100, known)
+    kept = parsed.frames[0]["sales_date"].dt.date.unique().tolist()
+    assert kept == [date(2024, 6, 1), date(2024, 6, 4)]
+    assert stale_days(parsed, known) == [date(2024, 6, 1), date(2024, 6, 3)]
+
+
+async def sales(pg):
+    rows = await pg.fetch(
+        "SELECT sales_date, store_name, item_name, sales_qty FROM sales "
+        "WHERE store_name IN ('Mapo', 'Jamsil') ORDER BY 1, 2, 3"
+    )
+    return [tuple(r) for r in rows]
+
+
+@pytest.mark.anyio
+async def test_reexport_removes_dropped_rows(session, tmp_path):
+    conn = await session.connection()
+    pg = (await conn.get_raw_connection()).driver_connection
+    await session.execute(
+        text("DELETE FROM sales WHERE store_name IN ('Mapo', 'Jamsil')")
+    )
+    source = str(tmp_path / "a.xlsx")
+
+    first = parse_workbook(write_workbook(source, EXPORT), 100)
+    await copy_into(pg, first.frames, upsert=True)
+    await record_manifest(pg, source, first)
+    assert len(await sales(pg)) == 5
+
+    reexport = EXPORT[:1] + EXPORT[2:4] + [row("2024-06-04", "Mapo", "Milk Bread", 2)]
+    known = (await load_manifest(pg, [source]))[source]
+    parsed = parse_workbook(write_workbook(source, reexport), 100, known)
+    await delete_stale_days(pg, source, parsed, stale_days(parsed, known))
+    await copy_into(pg, parsed.frames, upsert=True)
+    await record_manifest(pg, source, parsed)
+
+    assert await sales(pg) == [
+        (date(2024, 6, 1), "Mapo", "Milk Bread", 4),
+        (date(2024, 6, 2), "Jamsil", "Milk Bread", 1),
+        (date(2024, 6, 2), "Mapo", "Milk Bread", 6),
+        (date(2024, 6, 4), "Mapo", "Milk Bread", 2),
+    ]
+    stores = await pg.fetchval(
+        "SELECT store_names FROM sales_manifest_days "
+        "WHERE source = $1 AND sales_date = '2024-06-02'",
+        source,
+    )
+    assert stores == ["Jamsil", "Mapo"]
@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+from uuid import uuid4
+
+import pytest
+from pydantic import ValidationError
+
+from backend.app.schemas.inventory import (
+    MAX_RANGE_CELLS,
+    MAX_RANGE_DAYS,
+    MAX_RANGE_ITEMS,
+    InventoryRangeCreate,
+)
+
+START = date(2024, 1, 1)
+
+
+def payload(days, items):
+    end = START + timedelta(days=days - 1)
+    return {
+        "store_id": uuid4(),
+        "start_date": START,
+        "end_date": end,
+        "items": [{"item_id": item_id, "date": end, "db": 1} for item_id in items],
+    }
+
+
+def test_range_at_the_caps_is_accepted():
+    InventoryRangeCreate(**payload(MAX_RANGE_DAYS, [uuid4()]))
+
+
+def test_range_too_long():
+    with pytest.raises(ValidationError, match="at most"):
+        InventoryRangeCreate(**payload(MAX_RANGE_DAYS + 1, [uuid4()]))
+
+
+def test_too_many_entries():
+    item_id = uuid4()
+    with pytest.raises(ValidationError, match="at most"):
+        InventoryRangeCreate(**payload(1, [item_id] * (MAX_RANGE_ITEMS + 1)))
+
+
+def test_too_many_cells():
+    n_items = MAX_RANGE_CELLS // MAX_RANGE_DAYS + 1
+    with pytest.raises(ValidationError, match="cells"):
+        InventoryRangeCreate(
+            **payload(MAX_RANGE_DAYS, [uuid4() for _ in range(n_items)])
+        )
+
+
+def test_end_before_start():
+    data = payload(1, [uuid4()])
+    data["end_date"] = START - timedelta(days=1)
+    with pytest.raises(ValidationError, match="before start_date"):
+        InventoryRangeCreate(**data)
@@ -0,0 +1,73 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select, update
+
+from backend.app.models.inventory import Inventory
+from backend.app.models.inventory_rollup import InventoryRollup
+from backend.app.models.item import Item
+from backend.app.models.store import Store
+from backend.app.services.inventory import (
+    _refresh_rollups,
+    item_rollup_cells,
+    rebuild_rollup_cells,
+)
+
+pytestmark = pytest.mark.anyio
+
+DAY = date(2024, 5, 1)
+
+
+async def rollups(session, store_id):
+    rows = await session.execute(
+        select(InventoryRollup)
+        .where(InventoryRollup.store_id == store_id)
+        .order_by(InventoryRollup.category)
+        .execution_options(populate_existing=True)
+    )
+    return {r.category: (r.waste, r.waste_value) for r in rows.scalars()}
+
+
+async def test_item_edit_rebuilds_its_cells(session):
+    store = Store(name="rollups", type="test")
+    bread = Item(name="bread", category="bakery", cost=5)
+    cake = Item(name="cake", category="bakery", cost=20)
+    session.add_all([store, bread, cake])
+    await session.flush()
+    session.add_all(
+        [
+            Inventory(
+                store_id=store.id,
+                item_id=bread.id,
+                date=DAY,
+                db=9,
+                pg=5,
+                waste=4,
+                rem=0,
+            ),
+            Inventory(
+                store_id=store.id, item_id=cake.id, date=DAY, db=3, pg=2, waste=1, rem=0
+            ),
+        ]
+    )
+    await session.flush()
+    await _refresh_rollups(session, store.id, [DAY])
+    assert await rollups(session, store.id) == {"bakery": (5, 40)}
+
+    # a cost change and a category move, as PUT /items applies them
+    await session.execute(
+        update(Item).where(Item.id == cake.id).values(cost=30, category="dessert")
+    )
+    assert await item_rollup_cells(session, cake.id) == [(store.id, DAY)]
+    await rebuild_rollup_cells(session, await item_rollup_cells(session, cake.id))
+    assert await rollups(session, store.id) == {
+        "bakery": (4, 20),
+        "dessert": (1, 30),
+    }
+
+    # moving the last item out of a category leaves no row behind
+    await session.execute(
+        update(Item).where(Item.id == bread.id).values(category="dessert")
+    )
+    await rebuild_rollup_cells(session, await item_rollup_cells(session, bread.id))
+    assert await rollups(session, store.id) == {"dessert": (5, 50)}
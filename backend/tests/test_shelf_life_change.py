@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from backend.app.models.inventory import Inventory
+from backend.app.models.item import Item
+from backend.app.models.recompute_job import RecomputeJob
+from backend.app.services.inventory import (
+    _propagate_forward,
+    _seed_state,
+    _shelf_lives,
+    drain_recompute_queue,
+    enqueue_item_history,
+)
+from backend.tests.test_propagate_parity import (
+    START,
+    reference,
+    seed_history,
+    snapshot,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_shelf_life_change_recomputes_whole_history(session):
+    store, items = await seed_history(session, seed=5)
+    item_ids = [item.id for item in items]
+    lives = await _shelf_lives(session, item_ids)
+    seeds = await _seed_state(session, store.id, lives, START)
+    await _propagate_forward(session, store.id, seeds, START, converge=False)
+
+    item = next(item for item in items if item.shelf_life_days == 3)
+    await session.execute(
+        update(Item).where(Item.id == item.id).values(shelf_life_days=5)
+    )
+    await enqueue_item_history(session, item.id)
+
+    job = await session.scalar(
+        select(RecomputeJob).where(RecomputeJob.item_id == item.id)
+    )
+    last = await session.scalar(
+        select(Inventory.date)
+        .where(Inventory.item_id == item.id)
+        .order_by(Inventory.date.desc())
+        .limit(1)
+    )
+    assert job.start_date == START
+    assert job.dirty_until == last + timedelta(days=1)
+
+    assert await drain_recompute_queue(session) == 1
+
+    history = await session.execute(
+        select(Inventory.item_id, Inventory.date, Inventory.db, Inventory.pg)
+        .where(Inventory.store_id == store.id)
+        .order_by(Inventory.item_id, Inventory.date)
+    )
+    lives[item.id] = 5
+    assert await snapshot(session, store.id) == reference(history.all(), lives)
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from backend.app import xlsxtodb
+
+WORKBOOK = Path(__file__).resolve().parents[2] / "data" / "hero.xlsx"
+
+
+def test_parquet_cache_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    parsed = xlsxtodb.concat_cleaned(
+        xlsxtodb.iter_cleaned_chunks(WORKBOOK, chunk_rows=500, cache_dir=tmp_path)
+    )
+    assert len(list(tmp_path.glob("*.parquet"))) == 1
+
+    cached = xlsxtodb.read_cleaned(WORKBOOK, cache_dir=tmp_path)
+    pd.testing.assert_frame_equal(cached, parsed, check_categorical=False)
+
+
+def test_no_pyarrow_skips_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(xlsxtodb, "pq", None)
+    df = xlsxtodb.read_cleaned(WORKBOOK, cache_dir=tmp_path)
+    assert len(df) and list(df.columns)[:3] == ["sales_date", "store_name", "item_name"]
+    assert not list(tmp_path.iterdir())
+
+
+def test_clean_dataframe_leaves_raw_alone():
+    raw = pd.DataFrame(
+        {
+            "SALES_DATE": ["2024-01-02 13:00"],
+            "STORE_NAME": ["'Gangnam "],
+            "ITEM_NAME": ["'HAPPIPPANG Milk Bread"],
+            "SALES_QTY": ["3"],
+            "NET_SALES": [12.5],
+            "STORE_CODE": ["S1"],
+        }
+    )
+    before = raw.copy(deep=True)
+    df = xlsxtodb.clean_dataframe(raw)
+    pd.testing.assert_frame_equal(raw, before)
+    assert df.loc[0, "store_name"] == "Gangnam"
+    assert df.loc[0, "item_name"] == "Milk Bread"
+    assert df.loc[0, "net_sales"] == 1250
+    assert "STORE_CODE" not in df
+
+
+def test_cache_schema_does_not_depend_on_the_first_chunk(tmp_path):
+    pytest.importorskip("pyarrow")
+    from backend.tests.test_ingest import row, write_workbook
+
+    # one item in the first chunk, 200 distinct ones (> int8 indices) after
+    rows = [row("2024-06-01", "Mapo", "Milk Bread", 1)] * 200 + [
+        row("2024-06-02", "Mapo", f"Item {i}", 1) for i in range(200)
+    ]
+    path = write_workbook(tmp_path / "wide.xlsx", rows)
+    cache = tmp_path / "cache"
+    parsed = xlsxtodb.concat_cleaned(
+        xlsxtodb.iter_cleaned_chunks(path, chunk_rows=200, cache_dir=cache)
+    )
+    assert parsed["item_name"].nunique() == 201
+
+    cached = xlsxtodb.read_cleaned(path, cache_dir=cache)
+    pd.testing.assert_frame_equal(cached, parsed, check_categorical=False)
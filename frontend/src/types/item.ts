@@ -3,4 +3,5 @@ export interface Item {
   name: string;
   category: string;
   cost: number;
+  shelf_life_days: number;
 }